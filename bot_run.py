@@ -0,0 +1,230 @@
+import os
+import random
+import time
+import logging
+from config import load_config
+from relevance import RelevanceRanker
+from targets import TargetCatalog
+from circuit_breaker import breaker
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# The settings below come from .env; the entry scripts set up logging themselves
+load_config()
+
+POSTS = metrics.counter("bot_posts_total", "Project tweets posted")
+COMMENTS = metrics.counter("bot_comments_total", "Comments posted")
+ACTION_FAILURES = metrics.counter("bot_action_failures_total", "Failed actions by kind")
+DEFERRED = metrics.counter("bot_deferred_actions_total", "Actions left for a later run by an open circuit")
+
+BROWSER_BREAKER = breaker("browser")
+
+STREAM_GENERATION = os.getenv("GEMINI_STREAMING", "false").lower() == "true"
+# "compose" types the whole thread in one dialog; "chained" posts and acknowledges it part by part
+THREAD_MODE = os.getenv("THREAD_MODE", "compose")
+COMMENT_TOP_K = int(os.getenv("COMMENT_TOP_K", "8"))
+HARVEST_LIMIT = int(os.getenv("HARVEST_LIMIT", "5"))
+# "profiles" visits each account; "home" or an X List URL sweeps one timeline for all of them
+TIMELINE_SOURCE = os.getenv("TIMELINE_SOURCE", "profiles")
+
+# Projects and accounts live in targets.json and are reloaded when it changes
+catalog = None
+
+def get_catalog():
+    """Return the process-wide target catalog, reloading it if the file changed"""
+    global catalog
+    if catalog is None:
+        catalog = TargetCatalog()
+    else:
+        catalog.reload_if_changed()
+    return catalog
+
+def plan_run(queue, catalog):
+    """Pick this run's projects and accounts and persist them as a work queue"""
+    projects = []
+    accounts = []
+    if random.random() < 0.85:  # 85% chance to post project tweets
+        projects = catalog.sample_projects(2)
+    if random.random() < 0.7:  # 70% chance to comment on tweets
+        accounts = catalog.sample_accounts(15)
+    return queue.plan_run(projects, accounts)
+
+def check_posted(queue, action, result, operation):
+    """Raise if a post failed; a duplicate rejection is final, so the action is skipped instead"""
+    if result:
+        return True
+    reason = getattr(result, "reason", None)
+    if reason == "duplicate":
+        logger.warning(f"{operation} rejected as duplicate content, skipping {action['target']}")
+        queue.mark_skipped(action["action_id"], "rejected as duplicate")
+        return False
+    raise RuntimeError(f"{operation} failed ({reason or 'UI error'})")
+
+def process_project_post(queue, action, twitter_client, gemini_client, dedup_index):
+    """Generate (once) and post a project tweet"""
+    project = action["payload"]
+    tweet_content = action["content"]
+    progress = queue.thread_progress(action["action_id"]) if THREAD_MODE == "chained" else None
+    # A chained thread must resume from saved text, so it is never streamed
+    if tweet_content is None and STREAM_GENERATION and progress is None:
+        # Compose thread parts while the rest of the text is still being generated
+        stream = gemini_client.stream_project_tweet(project)
+        try:
+            posted = twitter_client.post_tweet_thread(stream.parts())
+        finally:
+            if stream.complete:
+                queue.save_content(action["action_id"], stream.text)
+        if not check_posted(queue, action, posted, "post_tweet_thread"):
+            return
+        tweet_content = stream.text
+    else:
+        if tweet_content is None:
+            tweet_content = gemini_client.generate_project_tweet(project)
+            queue.save_content(action["action_id"], tweet_content)
+        else:
+            logger.info(f"Reusing generated tweet for {project['name']}")
+        posted = twitter_client.post_tweet(tweet_content, progress)
+        if not check_posted(queue, action, posted, "post_tweet"):
+            return
+    queue.mark_done(action["action_id"], result_url=posted.url)
+    dedup_index.add(tweet_content, "project_tweet")
+    POSTS.inc()
+    logger.info(f"Posted tweet about {project['name']}")
+    time.sleep(random.uniform(5, 10))
+
+def pick_candidate(ranker, candidates):
+    """Choose the most relevant original tweet from one profile's harvest"""
+    originals = [tweet for tweet in candidates if not tweet["pinned"] and not tweet["retweet"]]
+    if not originals:
+        return None
+    # Ties keep timeline order, so the newest tweet wins when nothing is relevant
+    return max(originals, key=lambda tweet: ranker.score(tweet["text"]))
+
+def sweep_comment_targets(actions, twitter_client, known_ids):
+    """Collect candidates for every unscraped account from one timeline, or None in profile mode"""
+    usernames = [action["target"] for action in actions if action["tweet"] is None]
+    if TIMELINE_SOURCE == "profiles" or not usernames or not BROWSER_BREAKER.allow():
+        return None
+    timeline_url = "https://twitter.com/home" if TIMELINE_SOURCE == "home" else TIMELINE_SOURCE
+    swept = {}
+    try:
+        for tweet in twitter_client.sweep_timeline(timeline_url, usernames,
+                                                   per_author=HARVEST_LIMIT, known_ids=known_ids):
+            swept.setdefault(tweet["username"], []).append(tweet)
+    except Exception as e:
+        logger.error(f"Timeline sweep failed, falling back to profile visits: {str(e)}")
+        BROWSER_BREAKER.record_failure(e)
+        return None
+    BROWSER_BREAKER.record_success()
+    return swept
+
+def scrape_comment_targets(queue, actions, twitter_client, ranker):
+    """Fetch (once) the best recent tweet for each comment action, dropping accounts with none"""
+    known_ids = queue.commented_tweet_ids()
+    swept = sweep_comment_targets(actions, twitter_client, known_ids)
+    scraped = []
+    for action in actions:
+        if action["tweet"] is None:
+            if swept is None and not BROWSER_BREAKER.allow():
+                # Leave the action pending so the next run picks it up
+                logger.warning(f"Browser circuit open, deferring scrape of @{action['target']}")
+                DEFERRED.inc(kind="scrape")
+                continue
+            try:
+                if swept is not None:
+                    candidates = swept.get(action["target"], [])
+                else:
+                    candidates = list(twitter_client.harvest_timeline(
+                        action["target"], limit=HARVEST_LIMIT, known_ids=known_ids))
+                action["tweet"] = pick_candidate(ranker, candidates)
+            except Exception as e:
+                logger.error(f"Error getting latest tweet from @{action['target']}: {str(e)}")
+                ACTION_FAILURES.inc(kind="scrape")
+                BROWSER_BREAKER.record_failure(e)
+                queue.mark_failed(action["action_id"], e)
+                continue
+            if swept is None:
+                BROWSER_BREAKER.record_success()
+            if not action["tweet"]:
+                queue.mark_skipped(action["action_id"], "no tweet found")
+                continue
+            queue.save_tweet(action["action_id"], action["tweet"])
+        scraped.append(action)
+    return scraped
+
+def select_comment_targets(queue, actions, ranker, top_k=COMMENT_TOP_K):
+    """Keep only the top_k tweets most relevant to our projects"""
+    kept, dropped = ranker.rank(actions, lambda action: action["tweet"]["text"], top_k)
+    for score, action in kept:
+        logger.info(f"Comment target @{action['target']} relevance {score:.2f}")
+    for score, action in dropped:
+        logger.info(f"Skipping @{action['target']}, relevance {score:.2f} below top {top_k}")
+        queue.mark_skipped(action["action_id"], f"low relevance ({score:.2f})")
+    return [action for _, action in kept]
+
+def process_comment(queue, action, twitter_client, gemini_client, dedup_index, pause=True):
+    """Generate (once) and post a comment on an already scraped tweet; return whether it was posted"""
+    username = action["target"]
+    latest_tweet = action["tweet"]
+    if queue.is_posted(latest_tweet["url"]):
+        logger.info(f"Already commented on {latest_tweet['url']}, skipping")
+        queue.mark_skipped(action["action_id"], "already commented")
+        return False
+    comment = action["content"]
+    if comment is None:
+        comment = gemini_client.generate_comment(username, latest_tweet)
+        queue.save_content(action["action_id"], comment)
+    else:
+        logger.info(f"Reusing generated comment for @{username}")
+    posted = twitter_client.post_comment(latest_tweet["url"], comment)
+    if not check_posted(queue, action, posted, "post_comment"):
+        return False
+    queue.mark_done(action["action_id"], tweet_url=latest_tweet["url"], result_url=posted.url)
+    dedup_index.add(comment, "comment")
+    COMMENTS.inc()
+    logger.info(f"Commented on tweet by @{username}")
+    if pause:
+        time.sleep(random.uniform(3, 7))
+    return True
+
+def record_outcomes(queue, run_id, targets):
+    """Feed which projects and accounts produced a post back into scheduling"""
+    for kind, target, status in queue.run_outcomes(run_id):
+        targets.record_outcome("project" if kind == "project_post" else "account", target, status == "done")
+
+def process_actions(queue, actions, twitter_client, gemini_client, dedup_index, targets,
+                    top_k=COMMENT_TOP_K, still_ours=None):
+    """Post project tweets, then scrape, rank and comment on the given actions
+
+    still_ours, if given, is checked before each action so a worker whose
+    claim expired leaves the action to whoever took it over.
+    """
+    project_actions = [action for action in actions if action["kind"] == "project_post"]
+    comment_actions = [action for action in actions if action["kind"] == "comment"]
+    
+    # Scrape every target first so only the most relevant tweets reach Gemini
+    ranker = RelevanceRanker(targets.projects, queue.engaged_tweets())
+    comment_actions = scrape_comment_targets(queue, comment_actions, twitter_client, ranker)
+    comment_actions = select_comment_targets(queue, comment_actions, ranker, top_k)
+    
+    for action in project_actions + comment_actions:
+        if still_ours and not still_ours(action):
+            logger.warning(f"Lost the claim on {action['kind']} for {action['target']}, leaving it")
+            continue
+        if not BROWSER_BREAKER.allow():
+            # Fail fast instead of timing out on every remaining action; they stay pending
+            logger.warning(f"Browser circuit open, deferring {action['kind']} for {action['target']}")
+            DEFERRED.inc(kind=action["kind"])
+            continue
+        try:
+            if action["kind"] == "project_post":
+                process_project_post(queue, action, twitter_client, gemini_client, dedup_index)
+            else:
+                process_comment(queue, action, twitter_client, gemini_client, dedup_index)
+            BROWSER_BREAKER.record_success()
+        except Exception as e:
+            logger.error(f"Error processing {action['kind']} for {action['target']}: {str(e)}")
+            queue.mark_failed(action["action_id"], e)
+            ACTION_FAILURES.inc(kind=action["kind"])
+            BROWSER_BREAKER.record_failure(e)
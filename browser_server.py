@@ -0,0 +1,102 @@
+import os
+import time
+import random
+import logging
+import tempfile
+import subprocess
+import metrics
+
+logger = logging.getLogger(__name__)
+
+BROWSER_CONNECTS = metrics.counter("shared_browser_connects_total", "Connections to the shared browser by result")
+BROWSER_CONTEXTS = metrics.gauge("shared_browser_contexts", "Contexts this client holds in the shared browser")
+
+BROWSER_ARGS = ["--no-sandbox", "--disable-setuid-sandbox", "--disable-dev-shm-usage"]
+
+class SharedBrowser:
+    """A worker's connection to one Chromium shared by many processes over CDP
+
+    Each worker gets its own isolated contexts in the shared browser. The
+    connection is re-established with backoff when the browser restarts, and
+    a worker may hold at most BROWSER_MAX_CONTEXTS contexts (two, so the
+    memory governor can swap one in before closing the old one) while the
+    whole browser is capped at BROWSER_SERVER_MAX_CONTEXTS.
+    """
+
+    def __init__(self, playwright, endpoint=None):
+        self.playwright = playwright
+        self.endpoint = endpoint or os.getenv("BROWSER_ENDPOINT")
+        self.max_contexts = int(os.getenv("BROWSER_MAX_CONTEXTS", "2"))
+        self.server_max_contexts = int(os.getenv("BROWSER_SERVER_MAX_CONTEXTS", "16"))
+        self.connect_attempts = int(os.getenv("BROWSER_CONNECT_ATTEMPTS", "5"))
+        self.browser = None
+        self.contexts = []
+
+    def connected(self):
+        return self.browser is not None and self.browser.is_connected()
+
+    def connect(self):
+        """Connect (or reconnect) to the shared browser, backing off between attempts"""
+        for attempt in range(1, self.connect_attempts + 1):
+            try:
+                self.browser = self.playwright.chromium.connect_over_cdp(self.endpoint, timeout=30000)
+                self.contexts = []
+                BROWSER_CONNECTS.inc(result="ok")
+                logger.info(f"Connected to shared browser at {self.endpoint}")
+                return self.browser
+            except Exception as e:
+                BROWSER_CONNECTS.inc(result="error")
+                if attempt == self.connect_attempts:
+                    raise
+                backoff = random.uniform(0, min(30, 2 ** attempt))
+                logger.warning(f"Could not connect to shared browser ({str(e)}), retrying in {backoff:.1f} seconds")
+                time.sleep(backoff)
+
+    def _forget(self, context):
+        if context in self.contexts:
+            self.contexts.remove(context)
+        BROWSER_CONTEXTS.set(len(self.contexts))
+
+    def server_contexts(self):
+        """Count contexts held by every client; browser.contexts lists only this connection's"""
+        session = self.browser.new_browser_cdp_session()
+        try:
+            return len(session.send("Target.getBrowserContexts")["browserContextIds"])
+        finally:
+            session.detach()
+
+    def new_context(self, **options):
+        """Create an isolated context for this worker within the client and server limits"""
+        if not self.connected():
+            self.connect()
+        if len(self.contexts) >= self.max_contexts:
+            raise RuntimeError(f"Client already holds {len(self.contexts)} contexts in the shared browser")
+        if self.server_contexts() >= self.server_max_contexts:
+            raise RuntimeError(f"Shared browser is at its limit of {self.server_max_contexts} contexts")
+        context = self.browser.new_context(**options)
+        context.on("close", self._forget)
+        self.contexts.append(context)
+        BROWSER_CONTEXTS.set(len(self.contexts))
+        return context
+
+def serve():
+    """Run one headless Chromium that workers connect to over CDP, restarting it if it exits"""
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as playwright:
+        executable = playwright.chromium.executable_path
+    host = os.getenv("BROWSER_SERVER_HOST", "127.0.0.1")
+    port = os.getenv("BROWSER_SERVER_PORT", "9222")
+    user_data_dir = tempfile.mkdtemp(prefix="shared-chromium-")
+    args = [executable, "--headless=new", f"--remote-debugging-address={host}",
+            f"--remote-debugging-port={port}", f"--user-data-dir={user_data_dir}",
+            "--no-first-run", "--no-default-browser-check", *BROWSER_ARGS]
+    while True:
+        logger.info(f"Starting shared Chromium on {host}:{port}")
+        process = subprocess.Popen(args)
+        code = process.wait()
+        logger.warning(f"Shared Chromium exited with code {code}, restarting")
+        time.sleep(2)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    serve()
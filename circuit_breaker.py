@@ -0,0 +1,118 @@
+import os
+import time
+import logging
+import threading
+import metrics
+
+logger = logging.getLogger(__name__)
+
+BREAKER_STATE = metrics.gauge("circuit_breaker_state", "Breaker state per dependency (0 closed, 1 half-open, 2 open)")
+BREAKER_TRANSITIONS = metrics.counter("circuit_breaker_transitions_total", "Breaker state changes by dependency")
+BREAKER_REJECTIONS = metrics.counter("circuit_breaker_rejections_total", "Calls failed fast by an open breaker")
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# The dependency itself is gone; waiting for more failures only burns time
+FATAL_MESSAGES = (
+    "has been closed",
+    "Target closed",
+    "Browser closed",
+    "Connection closed",
+    "Execution context was destroyed",
+)
+FATAL_ERRORS = ("TargetClosedError", "Unauthenticated", "PermissionDenied")
+# Problems with one request rather than with the dependency
+IGNORED_ERRORS = ("InvalidArgument", "NotFound", "CircuitOpenError")
+
+_lock = threading.Lock()
+_breakers = {}
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+def classify(error):
+    """Return "fatal", "transient" or "ignore" for an exception raised by a dependency"""
+    name = type(error).__name__
+    message = str(error)
+    if name in FATAL_ERRORS or any(text in message for text in FATAL_MESSAGES):
+        return "fatal"
+    if name in IGNORED_ERRORS:
+        return "ignore"
+    return "transient"
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe
+
+    CIRCUIT_FAILURE_THRESHOLD transient failures in a row, or one fatal
+    failure, open the breaker. While open, allow() is False so callers fail
+    fast or defer work. After CIRCUIT_RESET_SECONDS one probe call is let
+    through; its outcome closes or reopens the breaker.
+    """
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = int(failure_threshold or os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+        self.reset_timeout = float(reset_timeout or os.getenv("CIRCUIT_RESET_SECONDS", "300"))
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        BREAKER_STATE.set(0, dependency=name)
+
+    def _transition(self, state):
+        if state != self.state:
+            logger.warning(f"Circuit breaker {self.name}: {self.state} -> {state}")
+            BREAKER_TRANSITIONS.inc(dependency=self.name, state=state)
+        self.state = state
+        BREAKER_STATE.set(STATE_VALUES[state], dependency=self.name)
+
+    def allow(self):
+        """Check whether a call may go ahead, letting one probe through once the reset timeout passes"""
+        with self.lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self.probing):
+                self.probing = self.state == HALF_OPEN
+                return True
+        BREAKER_REJECTIONS.inc(dependency=self.name)
+        return False
+
+    def is_open(self):
+        """Check whether calls are being failed fast, without using up the half-open probe"""
+        with self.lock:
+            return self.state == OPEN and self.clock() - self.opened_at < self.reset_timeout
+
+    def check(self):
+        """Raise CircuitOpenError unless a call may go ahead"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.probing = False
+            self._transition(CLOSED)
+
+    def record_failure(self, error):
+        """Count a failure and open the breaker if it is fatal or one too many"""
+        kind = classify(error) if isinstance(error, BaseException) else "transient"
+        with self.lock:
+            self.probing = False
+            if kind == "ignore":
+                return
+            self.failures += 1
+            if kind == "fatal" or self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+                self._transition(OPEN)
+
+def breaker(name):
+    """Return the process-wide breaker for a dependency"""
+    with _lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
@@ -0,0 +1,126 @@
+import os
+import re
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import logging
+from collections import OrderedDict
+from array import array
+import metrics
+from dedup_index import minhash, NUM_PERM
+from prompt_builder import normalize_text
+
+logger = logging.getLogger(__name__)
+
+MEMO_LOOKUPS = metrics.counter("comment_memo_lookups_total", "Comment memo lookups by result")
+
+def memo_key(text):
+    """Hash of the tweet text with case, punctuation, links and whitespace normalized away"""
+    normalized = re.sub(r"[^\w@#$ ]", "", normalize_text(text).lower())
+    return hashlib.sha1(" ".join(normalized.split()).encode("utf-8")).hexdigest()
+
+class CommentMemo:
+    """Generated comment candidates remembered per tweet text, in an LRU backed by SQLite
+
+    Lookups try the exact normalized hash first, then fall back to the most
+    similar remembered tweet (MinHash) above COMMENT_MEMO_SIMILARITY, so
+    reposts and light paraphrases of the same announcement reuse earlier
+    comments. Entries expire after COMMENT_MEMO_TTL_HOURS.
+    """
+
+    def __init__(self, db_path=None, ttl=None, capacity=None):
+        self.db_path = db_path or os.getenv("WORK_QUEUE_DB", "bot_state.db")
+        self.ttl = float(ttl or os.getenv("COMMENT_MEMO_TTL_HOURS", "72")) * 3600
+        self.capacity = int(capacity or os.getenv("COMMENT_MEMO_SIZE", "512"))
+        self.similarity = float(os.getenv("COMMENT_MEMO_SIMILARITY", "0.6"))
+        self.max_candidates = int(os.getenv("COMMENT_MEMO_CANDIDATES", "5"))
+        self.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS comment_memo (
+                key TEXT PRIMARY KEY,
+                signature BLOB NOT NULL,
+                candidates TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("DELETE FROM comment_memo WHERE created_at < ?", (time.time() - self.ttl,))
+        # key -> (created_at, signature, candidates), most recently used last
+        self.entries = OrderedDict()
+        rows = self.conn.execute(
+            "SELECT key, signature, candidates, created_at FROM comment_memo ORDER BY created_at DESC LIMIT ?",
+            (self.capacity,)
+        ).fetchall()
+        for key, blob, candidates, created_at in reversed(rows):
+            signature = array("Q")
+            signature.frombytes(blob)
+            self.entries[key] = (created_at, signature, json.loads(candidates))
+        logger.info(f"Loaded {len(self.entries)} memoized comment entries")
+
+    def _expired(self, created_at):
+        return time.time() - created_at > self.ttl
+
+    def _evict(self, key):
+        self.entries.pop(key, None)
+        self.conn.execute("DELETE FROM comment_memo WHERE key = ?", (key,))
+
+    def _entry(self, key, signature):
+        """Return the key of the exact or most similar live entry, or None"""
+        if key in self.entries:
+            return key, "hit"
+        best_key, best_score = None, 0.0
+        for other_key, (created_at, other, _) in self.entries.items():
+            score = sum(1 for x, y in zip(signature, other) if x == y) / NUM_PERM
+            if score > best_score:
+                best_key, best_score = other_key, score
+        if best_key is not None and best_score >= self.similarity:
+            return best_key, "similar"
+        return None, "miss"
+
+    def get(self, text, accept=None):
+        """Return a random remembered comment for this tweet that accept() allows, or None"""
+        key, result = self._entry(memo_key(text), minhash(normalize_text(text)))
+        if key is not None:
+            created_at, _, candidates = self.entries[key]
+            if self._expired(created_at):
+                self._evict(key)
+                key, result = None, "expired"
+        if key is None:
+            MEMO_LOOKUPS.inc(result=result)
+            return None
+
+        self.entries.move_to_end(key)
+        candidates = [c for c in self.entries[key][2] if accept is None or accept(c)]
+        if not candidates:
+            MEMO_LOOKUPS.inc(result="exhausted")
+            return None
+        MEMO_LOOKUPS.inc(result=result)
+        return random.choice(candidates)
+
+    def put(self, text, comments):
+        """Remember generated comments as candidates for this tweet text
+
+        Store every alternative from a generation, not only the one being
+        posted: the posted one is indexed as a duplicate right after, so the
+        others are what a later repost of this tweet can reuse.
+        """
+        key = memo_key(text)
+        created_at, signature, candidates = self.entries.pop(key, (None, None, []))
+        if created_at is None or self._expired(created_at):
+            created_at, signature, candidates = time.time(), minhash(normalize_text(text)), []
+        new = [comment for comment in comments if comment not in candidates]
+        candidates = (candidates + new)[-self.max_candidates:]
+        self.entries[key] = (created_at, signature, candidates)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO comment_memo (key, signature, candidates, created_at) VALUES (?, ?, ?, ?)",
+            (key, signature.tobytes(), json.dumps(candidates), created_at)
+        )
+        while len(self.entries) > self.capacity:
+            oldest, _ = self.entries.popitem(last=False)
+            self.conn.execute("DELETE FROM comment_memo WHERE key = ?", (oldest,))
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
@@ -0,0 +1,15 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+_loaded = False
+
+def load_config():
+    """Load environment variables from .env once per process"""
+    global _loaded
+    if _loaded:
+        return
+    from dotenv import load_dotenv
+    load_dotenv()
+    _loaded = True
+    logger.debug("Loaded environment configuration")
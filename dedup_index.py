@@ -0,0 +1,118 @@
+import os
+import re
+import time
+import zlib
+import random
+import sqlite3
+import logging
+from array import array
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+# Fixed seed so signatures stored on disk stay comparable across runs
+_rng = random.Random(1337)
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+URL_PATTERN = re.compile(r'https?://\S+')
+WORD_PATTERN = re.compile(r"[a-z0-9@#$']+")
+
+def shingles(text, k=2):
+    """Return word k-gram shingles of normalized text"""
+    words = WORD_PATTERN.findall(URL_PATTERN.sub(" ", text.lower()))
+    if len(words) < k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+def minhash(text):
+    """Compute the MinHash signature of a text"""
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles(text)]
+    if not hashes:
+        return array("Q", [MAX_HASH] * NUM_PERM)
+    return array("Q", [min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes) for a, b in PERMUTATIONS])
+
+def _band_keys(signature):
+    return [hash(tuple(signature[i * ROWS:(i + 1) * ROWS])) for i in range(BANDS)]
+
+class DuplicateIndex:
+    """On-disk MinHash/LSH index of everything the bot has posted"""
+
+    def __init__(self, db_path=None, threshold=None):
+        self.db_path = db_path or os.getenv("DEDUP_DB", os.getenv("WORK_QUEUE_DB", "bot_state.db"))
+        self.threshold = float(threshold or os.getenv("DEDUP_THRESHOLD", "0.6"))
+        self.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS posted_signatures (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                text TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self.texts = {}
+        self.signatures = {}
+        self.buckets = [{} for _ in range(BANDS)]
+        self.loaded_id = 0
+        self.refresh()
+        logger.info(f"Loaded {len(self.signatures)} posts into duplicate index")
+
+    def refresh(self):
+        """Index posts that other processes sharing the database added since the last refresh"""
+        rows = self.conn.execute(
+            "SELECT id, text, signature FROM posted_signatures WHERE id > ? ORDER BY id", (self.loaded_id,)
+        ).fetchall()
+        for post_id, text, blob in rows:
+            if post_id not in self.signatures:
+                signature = array("Q")
+                signature.frombytes(blob)
+                self._index(post_id, text, signature)
+            self.loaded_id = post_id
+
+    def _index(self, post_id, text, signature):
+        self.texts[post_id] = text
+        self.signatures[post_id] = signature
+        for band, key in enumerate(_band_keys(signature)):
+            self.buckets[band].setdefault(key, []).append(post_id)
+
+    def most_similar(self, text):
+        """Return (estimated Jaccard similarity, text) of the closest indexed post"""
+        self.refresh()
+        signature = minhash(text)
+        candidates = set()
+        for band, key in enumerate(_band_keys(signature)):
+            candidates.update(self.buckets[band].get(key, ()))
+        best_score, best_text = 0.0, None
+        for post_id in candidates:
+            other = self.signatures[post_id]
+            score = sum(1 for x, y in zip(signature, other) if x == y) / NUM_PERM
+            if score > best_score:
+                best_score, best_text = score, self.texts[post_id]
+        return best_score, best_text
+
+    def is_duplicate(self, text):
+        """Check whether text is too similar to something already posted"""
+        score, match = self.most_similar(text)
+        if score >= self.threshold:
+            logger.warning(f"Near-duplicate ({score:.2f}) of earlier post: {match[:50]}...")
+            return True
+        return False
+
+    def add(self, text, kind):
+        """Record a posted text"""
+        signature = minhash(text)
+        cursor = self.conn.execute(
+            "INSERT INTO posted_signatures (kind, text, signature, created_at) VALUES (?, ?, ?, ?)",
+            (kind, text, signature.tobytes(), time.time())
+        )
+        self._index(cursor.lastrowid, text, signature)
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
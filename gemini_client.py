@@ -1,17 +1,60 @@
 import os
 import time
 import random
+import asyncio
 import logging
-import google.generativeai as genai
-from dotenv import load_dotenv
+import threading
+import queue
+from collections import deque
+import metrics
+from config import load_config
+from thread_splitter import ThreadSplitter
+from circuit_breaker import breaker
+from prompt_builder import PromptBuilder, INSTRUCTIONS, estimate_tokens, split_alternatives
 
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+GEMINI_LATENCY = metrics.histogram("gemini_request_duration_seconds", "Gemini generate_content latency")
+GEMINI_ERRORS = metrics.counter("gemini_errors_total", "Failed Gemini generations")
+GEMINI_REQUESTS = metrics.counter("gemini_requests_total", "Gemini requests by result")
+GEMINI_RETRIES = metrics.counter("gemini_retries_total", "Gemini retries after a failed attempt")
+GEMINI_HEDGES = metrics.counter("gemini_hedged_requests_total", "Hedged second requests sent")
+GEMINI_INPUT_TOKENS = metrics.histogram("gemini_input_tokens", "Estimated input tokens per Gemini request")
+
+GEMINI_DUPLICATES = metrics.counter("gemini_duplicate_generations_total", "Generations rejected as near-duplicates")
+
+# Fallbacks used when generation fails or only produces near-duplicates
+FALLBACK_TWEETS = [
+    "Exploring {name}'s innovative approach in {category}. Check out their work at {website}",
+    "{name} is taking an interesting angle on {category}. Curious to see where it goes next. {website}",
+    "Been reading up on {name} lately. What stands out in {category} right now? {website}",
+    "Keeping an eye on {name} and how they approach {category}. {website}",
+    "{category} keeps evolving and {name} is one of the teams worth following. {website}",
+]
+FALLBACK_COMMENTS = [
+    "Interesting perspective @{username}! This connects well with recent developments in the space.",
+    "Good point @{username}, curious how this plays out over the next few months.",
+    "This is a take more people should be thinking about, @{username}.",
+    "Appreciate the breakdown @{username}. What do you think is the biggest risk here?",
+    "Solid thread of thought @{username}, the timing on this feels important.",
+]
+
+MODEL_NAME = "gemini-1.5-flash"
+
+GEMINI_BREAKER = breaker("gemini")
+
+# Errors that will not succeed on retry
+NON_RETRYABLE_ERRORS = ("InvalidArgument", "PermissionDenied", "Unauthenticated", "NotFound")
+
+_client_lock = threading.Lock()
+_client = None
 
 class GeminiClient:
-    def __init__(self):
+    def __init__(self, dedup_index=None, comment_memo=None):
+        load_config()
+        # Imported here so startup does not pay for the gRPC/protobuf stack
+        import google.generativeai as genai
+        
         # Configure Gemini API
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
@@ -19,8 +62,161 @@ class GeminiClient:
         
         genai.configure(api_key=api_key)
         # Use the correct model name for Gemini Flash
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        self.model = genai.GenerativeModel(MODEL_NAME)
         logger.info("Initialized Gemini 1.5 Flash model")
+        
+        # Keep the static instructions out of every request where the SDK allows it
+        self.models = {}
+        try:
+            for kind, instruction in INSTRUCTIONS.items():
+                self.models[kind] = genai.GenerativeModel(MODEL_NAME, system_instruction=instruction)
+        except TypeError:
+            logger.info("System instructions not supported by this SDK, inlining them in prompts")
+            self.models = {}
+        self.prompts = PromptBuilder(system_instructions=bool(self.models))
+        
+        self.timeout = float(os.getenv("GEMINI_TIMEOUT", "30"))
+        self.max_attempts = int(os.getenv("GEMINI_MAX_ATTEMPTS", "3"))
+        self.backoff_base = float(os.getenv("GEMINI_BACKOFF_BASE", "1"))
+        self.backoff_cap = float(os.getenv("GEMINI_BACKOFF_CAP", "20"))
+        self.hedge_enabled = os.getenv("GEMINI_HEDGE", "true").lower() == "true"
+        self.latencies = deque(maxlen=200)
+        self.dedup_index = dedup_index
+        self.comment_memo = comment_memo
+        self.dedup_attempts = int(os.getenv("DEDUP_REGENERATE_ATTEMPTS", "2"))
+        # Replies asked for per comment call when a memo is set; each extra one costs decode time
+        self.comment_alternatives = int(os.getenv("COMMENT_ALTERNATIVES", "2"))
+        
+        # One long-lived event loop owns the async gRPC channel so it is reused across calls
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever, name="gemini-loop", daemon=True)
+        self.loop_thread.start()
+    
+    def close(self):
+        """Cancel outstanding requests, close the gRPC channel, then stop and close the event loop"""
+        if self.loop.is_closed():
+            return
+        if self.loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=5)
+            except Exception as e:
+                logger.warning(f"Error shutting down Gemini client: {str(e)}")
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.loop_thread.join(timeout=5)
+        if not self.loop.is_running():
+            self.loop.close()
+    
+    async def _shutdown(self):
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # The models share the SDK's async client, whose channel is bound to this loop
+        transports = {}
+        for model in [self.model, *self.models.values()]:
+            transport = getattr(getattr(model, "_async_client", None), "transport", None)
+            if transport is not None:
+                transports[id(transport)] = transport
+        for transport in transports.values():
+            await transport.close()
+    
+    def _hedge_delay(self):
+        """Return the observed p95 latency once there are enough samples"""
+        if not self.hedge_enabled or len(self.latencies) < 20:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+    
+    def _model(self, kind):
+        return self.models.get(kind, self.model)
+    
+    def _count_input(self, prompt, kind):
+        """Estimate the request's input tokens locally before it is sent"""
+        tokens = estimate_tokens(prompt)
+        GEMINI_INPUT_TOKENS.observe(tokens, kind=kind)
+        return tokens
+    
+    async def _call(self, prompt, kind):
+        """Send a single request and return the stripped response text"""
+        tokens = self._count_input(prompt, kind)
+        start = time.monotonic()
+        response = await self._model(kind).generate_content_async(prompt)
+        text = response.text.strip()
+        elapsed = time.monotonic() - start
+        self.latencies.append(elapsed)
+        GEMINI_LATENCY.observe(elapsed, kind=kind)
+        logger.info(f"Gemini {kind} request: ~{tokens} input tokens, {elapsed:.2f} seconds")
+        return text
+    
+    async def _hedged_call(self, prompt, kind):
+        """Send a request and, if it is slower than p95, race a second one against it"""
+        first = asyncio.ensure_future(self._call(prompt, kind))
+        tasks = [first]
+        try:
+            hedge_delay = self._hedge_delay()
+            if hedge_delay is None:
+                return await first
+            
+            done, _ = await asyncio.wait({first}, timeout=hedge_delay)
+            if done:
+                return first.result()
+            
+            logger.info(f"Gemini request slower than p95 ({hedge_delay:.2f}s), sending hedged request")
+            GEMINI_HEDGES.inc(kind=kind)
+            tasks.append(asyncio.ensure_future(self._call(prompt, kind)))
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # wait_for cancels only this coroutine, so the requests it started are cancelled here
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    async def generate_async(self, prompt, kind="generic"):
+        """Generate text with a per-attempt deadline and jittered exponential backoff"""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                text = await asyncio.wait_for(self._hedged_call(prompt, kind), self.timeout)
+                GEMINI_REQUESTS.inc(kind=kind, result="ok")
+                return text
+            except Exception as e:
+                reason = "timeout" if isinstance(e, asyncio.TimeoutError) else type(e).__name__
+                GEMINI_REQUESTS.inc(kind=kind, result=reason)
+                if attempt == self.max_attempts or reason in NON_RETRYABLE_ERRORS:
+                    raise
+                # Full jitter keeps concurrent retries from synchronizing
+                backoff = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+                logger.warning(f"Gemini attempt {attempt} failed ({reason}), retrying in {backoff:.2f} seconds")
+                GEMINI_RETRIES.inc(kind=kind)
+                await asyncio.sleep(backoff)
+    
+    def _generate(self, prompt, kind):
+        """Run generate_async on the client's event loop and wait for the result"""
+        # Fail fast (callers use their fallbacks) while Gemini keeps failing
+        GEMINI_BREAKER.check()
+        future = asyncio.run_coroutine_threadsafe(self.generate_async(prompt, kind), self.loop)
+        # Upper bound covering every attempt plus the maximum backoff between them
+        overall = self.max_attempts * (self.timeout + self.backoff_cap)
+        try:
+            text = future.result(timeout=overall)
+        except Exception as e:
+            future.cancel()
+            GEMINI_BREAKER.record_failure(e)
+            raise
+        GEMINI_BREAKER.record_success()
+        return text
+    
+    def _project_prompt(self, project):
+        """Build the generation prompt for a project tweet"""
+        return self.prompts.project_prompt(project)
     
     def generate_project_tweet(self, project):
         """Generate tweet content for a project"""
@@ -28,77 +224,167 @@ class GeminiClient:
             logger.info(f"Generating tweet content for {project['name']}")
             logger.info(f"Project details: Category: {project['category']}, Twitter: {project['twitter']}")
             
-            # Construct the prompt
-            prompt = f"""
-            You are a Web3 and blockchain expert. Create an English tweet about this project:
-            
-            - Project Name: {project['name']}
-            - Twitter: {project['twitter']}
-            - Website: {project['website']}
-            - Category: {project['category']}
-            
-            Rules:
-            1. Authentic, unique content that feels human-written
-            2. Analytical and interpretive approach (not just promotional)
-            3. No copy-paste, unique sentences
-            4. Thought-provoking questions/highlights
-            5. Insights connected to Web3 trends
-            6. If content exceeds 280 characters, it's fine - it will be posted as a thread
-            7. Emoji restriction: Max 2 emojis
-            8. Format: 
-               "Thoughts about the project... 
-               [Interesting question/highlight] 
-               {project['website']}"
-            """
+            prompt = self._project_prompt(project)
             
             logger.debug(f"Sending prompt to Gemini: {prompt[:100]}...")
             
-            # Generate content with Gemini
-            response = self.model.generate_content(prompt)
-            tweet_content = response.text.strip()
-            
-            logger.info(f"Generated tweet content: {tweet_content}")
-            return tweet_content
+            # Generate content with Gemini, regenerating near-duplicates of earlier posts
+            for attempt in range(1 + self.dedup_attempts):
+                tweet_content = self._generate(prompt, "project_tweet")
+                
+                logger.info(f"Generated tweet content: {tweet_content}")
+                if not self._is_duplicate(tweet_content, "project_tweet"):
+                    return tweet_content
+            logger.warning("Every generation was a near-duplicate, using fallback pool")
             
         except Exception as e:
             logger.error(f"Error generating tweet content for {project['name']}: {str(e)}")
-            logger.info("Using fallback tweet instead")
-            # Return a fallback tweet if generation fails
-            fallback_tweet = f"Exploring {project['name']}'s innovative approach in {project['category']}. Check out their work at {project['website']}"
-            return fallback_tweet
+            GEMINI_ERRORS.inc(kind="project_tweet")
+        
+        logger.info("Using fallback tweet instead")
+        return self._fallback(FALLBACK_TWEETS, name=project['name'],
+                              category=project['category'], website=project['website'])
+    
+    def _is_duplicate(self, text, kind):
+        """Check generated text against the index of earlier posts"""
+        if self.dedup_index and self.dedup_index.is_duplicate(text):
+            GEMINI_DUPLICATES.inc(kind=kind)
+            return True
+        return False
+    
+    def _fallback(self, templates, **fields):
+        """Pick a fallback that has not been posted recently, in random order"""
+        candidates = [template.format(**fields) for template in templates]
+        random.shuffle(candidates)
+        for candidate in candidates:
+            if not self.dedup_index or not self.dedup_index.is_duplicate(candidate):
+                return candidate
+        return candidates[0]
+    
+    def _stream(self, prompt, kind):
+        """Yield response text chunks as Gemini produces them"""
+        GEMINI_BREAKER.check()
+        chunks = queue.Queue()
+        
+        async def produce():
+            try:
+                tokens = self._count_input(prompt, kind)
+                start = time.monotonic()
+                response = await asyncio.wait_for(
+                    self._model(kind).generate_content_async(prompt, stream=True), self.timeout)
+                async for chunk in response:
+                    chunks.put(chunk.text)
+                elapsed = time.monotonic() - start
+                GEMINI_LATENCY.observe(elapsed, kind=kind)
+                GEMINI_REQUESTS.inc(kind=kind, result="ok")
+                GEMINI_BREAKER.record_success()
+                logger.info(f"Gemini {kind} stream: ~{tokens} input tokens, {elapsed:.2f} seconds")
+            except Exception as e:
+                GEMINI_REQUESTS.inc(kind=kind, result=type(e).__name__)
+                GEMINI_BREAKER.record_failure(e)
+                chunks.put(e)
+            finally:
+                chunks.put(None)
+        
+        asyncio.run_coroutine_threadsafe(produce(), self.loop)
+        while True:
+            item = chunks.get(timeout=self.timeout)
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    
+    def stream_project_tweet(self, project):
+        """Generate a project tweet as thread parts that are yielded as soon as they are final"""
+        return StreamedTweet(self, project)
     
     def generate_comment(self, username, tweet_data):
         """Generate a comment for a tweet"""
-        prompt = f"""
-        I want you to generate an engaging and relevant comment for the following tweet by @{username}:
+        # Reposts and paraphrases of the same announcement reuse an earlier comment
+        if self.comment_memo:
+            accept = lambda candidate: not (self.dedup_index and self.dedup_index.is_duplicate(candidate))
+            comment = self.comment_memo.get(tweet_data['text'], accept)
+            if comment:
+                logger.info(f"Using memoized comment: {comment}")
+                return comment
+        
+        # With a memo, one call also produces a spare reply that a later repost can reuse
+        alternatives = max(1, self.comment_alternatives) if self.comment_memo else 1
+        prompt = self.prompts.comment_prompt(username, tweet_data['text'], alternatives)
 
-        Tweet: {tweet_data['text']}
+        try:
+            for attempt in range(1 + self.dedup_attempts):
+                response = self._generate(prompt, "comment")
+                comments = split_alternatives(response)[:alternatives] if alternatives > 1 else [response]
+                if alternatives > 1 and len(comments) < 2:
+                    # The model ignored the separator format; posting the blob would post several replies in one
+                    logger.warning("Could not split the generated replies, regenerating")
+                    GEMINI_REQUESTS.inc(kind="comment", result="unsplittable")
+                    continue
+                
+                # Ensure the comments are not too long
+                comments = [comment if len(comment) <= 280 else comment[:277] + "..." for comment in comments]
+                comments = [comment for comment in comments if not self._is_duplicate(comment, "comment")]
+                if comments:
+                    comment = comments[0]
+                    logger.info(f"Generated comment: {comment}")
+                    if self.comment_memo:
+                        self.comment_memo.put(tweet_data['text'], comments)
+                    return comment
+            logger.warning("Every generation was a near-duplicate, using fallback pool")
+        except Exception as e:
+            logger.error(f"Error generating comment: {str(e)}")
+            GEMINI_ERRORS.inc(kind="comment")
+        
+        logger.info("Using fallback comment instead")
+        return self._fallback(FALLBACK_COMMENTS, username=username)
 
-        Please generate a comment that:
-        1. Is relevant to the tweet's content
-        2. Adds value to the discussion
-        3. Is engaging but professional
-        4. May include a thoughtful question
-        5. Is under 280 characters
-        6. Avoids generic responses
-        7. Is neither overly positive nor negative
-        8. Uses appropriate emojis sparingly (max 1-2)
+def get_client(dedup_index=None, comment_memo=None):
+    """Return the process-wide client, pointed at the caller's dedup index and memo
 
-        Format: Just provide the comment text directly, no additional context or explanations.
-        """
+    Creating a client starts an event loop and, on the first request, an async
+    gRPC channel bound to that loop. Scheduled runs reuse both instead of
+    opening a new loop and channel every run; close() it once at process exit.
+    """
+    global _client
+    with _client_lock:
+        if _client is None or _client.loop.is_closed():
+            _client = GeminiClient()
+        _client.dedup_index = dedup_index
+        _client.comment_memo = comment_memo
+        return _client
 
+class StreamedTweet:
+    """Streaming project tweet; iterate parts() and read text once it is exhausted"""
+    
+    def __init__(self, client, project):
+        self.client = client
+        self.project = project
+        self.splitter = ThreadSplitter()
+        self.complete = False
+    
+    @property
+    def text(self):
+        return self.splitter.text.strip()
+    
+    def parts(self):
+        """Yield thread parts while generation is still running"""
+        logger.info(f"Streaming tweet content for {self.project['name']}")
         try:
-            response = self.model.generate_content(prompt)
-            comment = response.text.strip()
-            
-            # Ensure the comment is not too long
-            if len(comment) > 280:
-                comment = comment[:277] + "..."
-
-            logger.info(f"Generated comment: {comment}")
-            return comment
+            prompt = self.client._project_prompt(self.project)
+            for chunk in self.client._stream(prompt, "project_tweet"):
+                yield from self.splitter.feed(chunk)
         except Exception as e:
-            logger.error(f"Error generating comment: {str(e)}")
-            logger.info("Using fallback comment instead")
-            # Return a fallback comment if generation fails
-            return f"Interesting perspective @{username}! This connects well with recent developments in the space."
\ No newline at end of file
+            if self.splitter.emitted:
+                # Nothing is posted until the whole thread is composed, so give up rather than
+                # post a thread cut off mid-sentence without its website line
+                logger.error(f"Streaming failed after {self.splitter.emitted} parts: {str(e)}")
+                raise
+            else:
+                logger.warning(f"Streaming failed, falling back to a full generation: {str(e)}")
+                self.splitter = ThreadSplitter()
+                yield from self.splitter.feed(self.client.generate_project_tweet(self.project))
+        yield from self.splitter.finish()
+        self.complete = True
+        logger.info(f"Generated tweet content: {self.text}")
@@ -4,15 +4,16 @@ import imaplib
 import email
 import logging
 from email.header import decode_header
-from dotenv import load_dotenv
+from config import load_config
+from circuit_breaker import breaker
 
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+IMAP_BREAKER = breaker("imap")
 
 class GmailReader:
     def __init__(self):
+        load_config()
         self.email_address = os.getenv("EMAIL_ADDRESS")
         self.password = os.getenv("GMAIL_APP_PASSWORD")
         
@@ -21,6 +22,9 @@ class GmailReader:
     
     def get_twitter_verification_code(self):
         """Get Twitter verification code from Gmail"""
+        if not IMAP_BREAKER.allow():
+            logger.error("IMAP circuit is open, not connecting to Gmail")
+            return None
         try:
             logger.info("Connecting to Gmail to get Twitter/X verification code")
             
@@ -29,6 +33,7 @@ class GmailReader:
             mail.login(self.email_address, self.password)
             mail.select("inbox")
             logger.info("Successfully connected to Gmail inbox")
+            IMAP_BREAKER.record_success()
             
             # First try to find emails with the exact subject pattern "Your X confirmation code is..."
             specific_subject = '(SUBJECT "Your X confirmation code is")'
@@ -143,4 +148,5 @@ class GmailReader:
                 
         except Exception as e:
             logger.error(f"Error retrieving Twitter verification code: {str(e)}")
+            IMAP_BREAKER.record_failure(e)
             return None
\ No newline at end of file
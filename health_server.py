@@ -0,0 +1,65 @@
+import os
+import json
+import time
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# A run every two hours; allow one missed run before reporting not ready
+READY_MAX_AGE = float(os.getenv("READY_MAX_AGE_SECONDS", str(5 * 3600)))
+
+def readiness():
+    """Return (ready, details) from the readiness signals reported by the bot"""
+    status = metrics.get_status()
+    last_success = status.get("last_successful_run")
+    details = {
+        "browser_alive": status.get("browser_alive", False),
+        "session_valid": status.get("session_valid", False),
+        "last_successful_run": last_success,
+        "run_in_progress": status.get("run_in_progress", False),
+    }
+    recent = last_success is not None and time.time() - last_success < READY_MAX_AGE
+    # The browser is only open during a run, so it is required only then
+    browser_ok = details["browser_alive"] or not details["run_in_progress"]
+    return recent and details["session_valid"] and browser_ok, details
+
+class HealthHandler(BaseHTTPRequestHandler):
+    """Serve liveness, readiness and Prometheus metrics"""
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path in ("/", "/healthz"):
+            self._send(200, "application/json", json.dumps({"status": "alive"}))
+        elif path == "/ready":
+            ready, details = readiness()
+            details["ready"] = ready
+            self._send(200 if ready else 503, "application/json", json.dumps(details))
+        elif path == "/metrics":
+            self._send(200, "text/plain; version=0.0.4", metrics.render_prometheus())
+        else:
+            self._send(404, "application/json", json.dumps({"error": "not found"}))
+
+    def _send(self, code, content_type, body):
+        data = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Health probes are frequent; keep them out of the bot log
+        logger.debug(format % args)
+
+def start_health_server(port=None):
+    """Start the health/metrics server on a daemon thread and return it"""
+    port = int(port or os.getenv("PORT", "8080"))
+    server = ThreadingHTTPServer(("0.0.0.0", port), HealthHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="health-server", daemon=True)
+    thread.start()
+    logger.info(f"Health server listening on port {port}")
+    return server
@@ -0,0 +1,132 @@
+import os
+import time
+import socket
+import sqlite3
+import logging
+import importlib
+import threading
+import metrics
+
+logger = logging.getLogger(__name__)
+
+LEASE_EVENTS = metrics.counter("lease_events_total", "Lease acquisitions, steals, renewals and losses")
+LEASES_HELD = metrics.gauge("leases_held", "Leases currently held by this worker")
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class SqliteLeaseStore:
+    """Named, expiring leases in SQLite so worker processes on one host can share one work queue
+
+    A lease belongs to one worker until it expires. The owner keeps it alive
+    with heartbeats; a lease whose owner stopped heartbeating can be taken over
+    by any other worker (work stealing). Any class with the same acquire,
+    renew, release and holds methods can be used instead through LEASE_BACKEND,
+    but the work queue and the other shared state stay in local SQLite.
+    """
+
+    def __init__(self, worker_id=None, ttl=None, db_path=None):
+        self.worker_id = worker_id or default_worker_id()
+        self.ttl = float(ttl or os.getenv("LEASE_TTL_SECONDS", "120"))
+        self.db_path = db_path or os.getenv("LEASE_DB", os.getenv("WORK_QUEUE_DB", "bot_state.db"))
+        # Shared with the heartbeat thread
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                acquired_at REAL NOT NULL
+            )
+        """)
+
+    def acquire(self, name):
+        """Take a lease that is free, expired or already ours; return whether we hold it"""
+        with self.lock:
+            # BEGIN IMMEDIATE takes the write lock, so two workers never both see the lease as free
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self.conn.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+                if row and row[0] != self.worker_id and row[1] >= now:
+                    return False
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO leases (name, owner, expires_at, acquired_at) VALUES (?, ?, ?, ?)",
+                    (name, self.worker_id, now + self.ttl, now)
+                )
+            finally:
+                self.conn.execute("COMMIT")
+        if row and row[0] != self.worker_id:
+            logger.info(f"Took over expired lease {name} from {row[0]}")
+            LEASE_EVENTS.inc(event="steal")
+        else:
+            LEASE_EVENTS.inc(event="acquire")
+        return True
+
+    def renew(self):
+        """Heartbeat: extend every lease we hold; return the names still held"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE owner = ? AND expires_at >= ?",
+                (now + self.ttl, self.worker_id, now)
+            )
+            names = [row[0] for row in self.conn.execute(
+                "SELECT name FROM leases WHERE owner = ?", (self.worker_id,))]
+        LEASE_EVENTS.inc(event="renew")
+        LEASES_HELD.set(len(names), worker=self.worker_id)
+        return names
+
+    def holds(self, name):
+        """Check that a lease is still ours and unexpired, e.g. right before a side effect"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM leases WHERE name = ? AND owner = ? AND expires_at >= ?",
+                (name, self.worker_id, time.time())
+            ).fetchone()
+        if row is None:
+            LEASE_EVENTS.inc(event="lost")
+        return row is not None
+
+    def release(self, name):
+        with self.lock:
+            self.conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, self.worker_id))
+
+    def close(self):
+        """Release everything we hold and close the connection"""
+        with self.lock:
+            self.conn.execute("DELETE FROM leases WHERE owner = ?", (self.worker_id,))
+            self.conn.close()
+
+def open_lease_store(worker_id=None):
+    """Create the configured lease store; LEASE_BACKEND may name another class as module:Class"""
+    backend = os.getenv("LEASE_BACKEND", "sqlite")
+    if backend == "sqlite":
+        return SqliteLeaseStore(worker_id)
+    module_name, class_name = backend.split(":", 1)
+    return getattr(importlib.import_module(module_name), class_name)(worker_id)
+
+class Heartbeat:
+    """Background thread that renews a store's leases every third of their TTL"""
+
+    def __init__(self, store):
+        self.store = store
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.store.ttl / 3):
+            try:
+                self.store.renew()
+            except Exception as e:
+                logger.error(f"Lease heartbeat failed: {str(e)}")
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join(timeout=5)
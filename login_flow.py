@@ -0,0 +1,158 @@
+import os
+import time
+import logging
+import metrics
+from circuit_breaker import breaker
+
+logger = logging.getLogger(__name__)
+
+LOGIN_STATE_DURATION = metrics.histogram("twitter_login_state_duration_seconds", "Time spent in each login state")
+
+LOGIN_URL = "https://x.com/i/flow/login"
+
+USERNAME_INPUT = 'input[autocomplete="username"]'
+PASSWORD_INPUT = 'input[name="password"]'
+# X uses the same input for "confirm your identity" prompts and emailed codes
+CHALLENGE_INPUT = 'input[data-testid="ocfEnterTextTextInput"]'
+HOME_INDICATOR = '[data-testid="AppTabBar_Home_Link"]'
+
+# Seconds each state may take before the login is abandoned
+DEADLINES = {
+    # Includes loading the login page
+    "username": 40,
+    "identify": 20,
+    "password": 20,
+    "challenge": float(os.getenv("LOGIN_CHALLENGE_DEADLINE", "90")),
+    "verify": 20,
+}
+
+CLICK_BUTTON_JS = '''(labels) => {
+    const buttons = Array.from(document.querySelectorAll('[role="button"], button'));
+    const button = buttons.find(btn => labels.some(label => btn.textContent.includes(label)));
+    if (button) {
+        button.click();
+        return true;
+    }
+    return false;
+}'''
+
+NEXT_LABELS = ["Next", "İleri"]
+LOGIN_LABELS = ["Log in", "Login", "Giriş yap"]
+VERIFY_LABELS = ["Next", "Verify", "İleri", "Doğrula"]
+
+class LoginDeadlineExceeded(Exception):
+    """Raised when a login state runs out of time before its next browser call"""
+
+class LoginFlow:
+    """Login as an explicit state machine: username -> password -> challenge -> verify -> home
+
+    Transitions are detected by waiting for the first of a few targeted
+    selectors to appear, never by dumping page content. Each state has its
+    own deadline and its duration is exported as a metric.
+    """
+
+    def __init__(self, page, gmail_factory=None):
+        self.page = page
+        self.gmail_factory = gmail_factory
+        self.timings = {}
+        self.verification_code = None
+
+    def run(self):
+        """Drive the flow to completion and report whether we reached the home timeline"""
+        state = "username"
+        while state not in ("home", "failed"):
+            handler = getattr(self, f"_{state}")
+            start = time.monotonic()
+            deadline = start + DEADLINES[state]
+            try:
+                next_state = handler(deadline)
+            except Exception as e:
+                logger.error(f"Login state '{state}' failed: {str(e)}")
+                next_state = "failed"
+            elapsed = time.monotonic() - start
+            self.timings[state] = elapsed
+            LOGIN_STATE_DURATION.observe(elapsed, state=state)
+            logger.info(f"Login state {state} -> {next_state} in {elapsed:.2f} seconds")
+            state = next_state
+
+        if state == "failed":
+            try:
+                self.page.screenshot(path="login_error.png")
+            except Exception:
+                pass
+        return state == "home"
+
+    def _remaining_ms(self, deadline):
+        """Time left as a Playwright timeout; never 0, which Playwright treats as no timeout"""
+        remaining = (deadline - time.monotonic()) * 1000
+        if remaining < 1:
+            raise LoginDeadlineExceeded("Login state deadline passed")
+        return remaining
+
+    def _wait_for_any(self, candidates, deadline):
+        """Return the state of the first candidate selector to become visible"""
+        combined = ", ".join(selector for _, selector in candidates)
+        self.page.wait_for_selector(combined, state="visible", timeout=self._remaining_ms(deadline))
+        for state, selector in candidates:
+            element = self.page.query_selector(selector)
+            if element and element.is_visible():
+                return state
+        return "failed"
+
+    def _fill(self, selector, value, deadline):
+        self.page.fill(selector, value, timeout=self._remaining_ms(deadline))
+
+    def _click(self, labels, deadline, fallback_selector=None):
+        if fallback_selector and self.page.query_selector(fallback_selector):
+            self.page.click(fallback_selector, timeout=self._remaining_ms(deadline))
+            return
+        # Clicks the first matching button, retrying until one renders or the deadline passes
+        self.page.wait_for_function(CLICK_BUTTON_JS, arg=labels, timeout=self._remaining_ms(deadline))
+
+    def _username(self, deadline):
+        self.page.goto(LOGIN_URL, wait_until="domcontentloaded", timeout=self._remaining_ms(deadline))
+        self.page.wait_for_selector(USERNAME_INPUT, state="visible", timeout=self._remaining_ms(deadline))
+        self._fill(USERNAME_INPUT, os.getenv("TWITTER_USERNAME"), deadline)
+        self._click(NEXT_LABELS, deadline)
+        return self._wait_for_any([
+            ("password", PASSWORD_INPUT),
+            ("identify", CHALLENGE_INPUT),
+        ], deadline)
+
+    def _identify(self, deadline):
+        """Answer the "confirm your phone number or email" prompt shown before the password"""
+        answer = os.getenv("TWITTER_IDENTITY") or os.getenv("EMAIL_ADDRESS") or os.getenv("TWITTER_USERNAME")
+        self._fill(CHALLENGE_INPUT, answer, deadline)
+        self._click(NEXT_LABELS, deadline)
+        return self._wait_for_any([("password", PASSWORD_INPUT)], deadline)
+
+    def _password(self, deadline):
+        self._fill(PASSWORD_INPUT, os.getenv("TWITTER_PASSWORD"), deadline)
+        self._click(LOGIN_LABELS, deadline, '[data-testid="LoginForm_Login_Button"]')
+        return self._wait_for_any([
+            ("home", HOME_INDICATOR),
+            ("challenge", CHALLENGE_INPUT),
+        ], deadline)
+
+    def _challenge(self, deadline):
+        """Fetch the emailed confirmation code, polling until it arrives or the deadline passes"""
+        if self.gmail_factory is None:
+            from gmail_reader import GmailReader
+            self.gmail_factory = GmailReader
+        gmail_reader = self.gmail_factory()
+        while time.monotonic() < deadline:
+            if breaker("imap").is_open():
+                logger.error("IMAP circuit is open, giving up on the verification code")
+                return "failed"
+            self.verification_code = gmail_reader.get_twitter_verification_code()
+            if self.verification_code:
+                logger.info("Retrieved verification code from Gmail")
+                return "verify"
+            time.sleep(min(5, max(0, deadline - time.monotonic())))
+        logger.error("Failed to get verification code from Gmail before the deadline")
+        return "failed"
+
+    def _verify(self, deadline):
+        self._fill(CHALLENGE_INPUT, self.verification_code, deadline)
+        self._click(VERIFY_LABELS, deadline, '[data-testid="ocfEnterTextNextButton"]')
+        return self._wait_for_any([("home", HOME_INDICATOR)], deadline)
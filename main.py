@@ -1,12 +1,21 @@
 import os
-import random
 import time
 import schedule
 import logging
 from datetime import datetime
-from dotenv import load_dotenv
+from config import load_config
+from utils import warm_up_imports
 from twitter_client import TwitterClient
-from gemini_client import GeminiClient
+import gemini_client as gemini
+from work_queue import WorkQueue
+from dedup_index import DuplicateIndex
+from comment_memo import CommentMemo
+from session_keepalive import SessionKeepAlive
+from health_server import start_health_server
+from watch import AccountWatcher
+from bot_run import get_catalog, plan_run, process_actions, process_comment, record_outcomes, \
+    ACTION_FAILURES, BROWSER_BREAKER
+import metrics
 
 # Configure logging with UTF-8 encoding
 logging.basicConfig(
@@ -24,122 +33,209 @@ sys.stdout.reconfigure(encoding='utf-8')
 logger = logging.getLogger(__name__)
 
 # Load environment variables
-load_dotenv()
-
-# Load project data
-PROJECTS = [
-    {"name": "Allora", "twitter": "@AlloraNetwork", "website": "allora.network", "category": "AI + Blockchain"},
-            {"name": "Caldera", "twitter": "@Calderaxyz", "website": "caldera.xyz", "category": "Rollup Infrastructure"},
-            {"name": "Camp Network", "twitter": "@campnetworkxyz", "website": "campnetwork.xyz", "category": "Social Layer"},
-            {"name": "Eclipse", "twitter": "@EclipseFND", "website": "eclipse.builders", "category": "SVM L2"},
-            {"name": "Fogo", "twitter": "@FogoChain", "website": "fogo.io", "category": "Gaming Chain"},
-            {"name": "Humanity Protocol", "twitter": "@Humanityprot", "website": "humanity.org", "category": "Identity"},
-            {"name": "Hyperbolic", "twitter": "@hyperbolic_labs", "website": "hyperbolic.xyz", "category": "AI Infrastructure"},
-            {"name": "Infinex", "twitter": "@infinex", "website": "infinex.xyz", "category": "DeFi Frontend"},
-            {"name": "Irys", "twitter": "@irys_xyz", "website": "irys.xyz", "category": "Data Storage"},
-            {"name": "Katana", "twitter": "@KatanaRIPNet", "website": "katana.network", "category": "Gaming Infrastructure"},
-            {"name": "Lombard", "twitter": "@Lombard_Finance", "website": "lombard.finance", "category": "Bitcoin DeFi"},
-            {"name": "MegaETH", "twitter": "@megaeth_labs", "website": "megaeth.com", "category": "High-Performance L2"},
-            {"name": "Mira Network", "twitter": "@mira_network", "website": "mira.network", "category": "Cross-Chain"},
-            {"name": "Mitosis", "twitter": "@MitosisOrg", "website": "mitosis.org", "category": "Ecosystem Expansion"},
-            {"name": "Monad", "twitter": "@monad_xyz", "website": "monad.xyz", "category": "Parallel EVM"},
-            {"name": "Multibank", "twitter": "@multibank_io", "website": "multibank.io", "category": "Multi-Chain Banking"},
-            {"name": "Multipli", "twitter": "@multiplifi", "website": "multipli.fi", "category": "Yield Optimization"},
-            {"name": "Newton", "twitter": "@MagicNewton", "website": "newton.xyz", "category": "Cross-Chain Liquidity"},
-            {"name": "Novastro", "twitter": "@Novastro_xyz", "website": "novastro.xyz", "category": "Cosmos DeFi"},
-            {"name": "Noya.ai", "twitter": "@NetworkNoya", "website": "noya.ai", "category": "AI-Powered DeFi"},
-            {"name": "OpenLedger", "twitter": "@OpenledgerHQ", "website": "openledger.xyz", "category": "Institutional DeFi"},
-            {"name": "PARADEX", "twitter": "@tradeparadex", "website": "paradex.trade", "category": "Perpetuals DEX"},
-            {"name": "Portal to BTC", "twitter": "@PortaltoBitcoin", "website": "portaltobitcoin.com", "category": "Bitcoin Bridge"},
-            {"name": "Puffpaw", "twitter": "@puffpaw_xyz", "website": "puffpaw.xyz", "category": "Gaming + NFT"},
-            {"name": "SatLayer", "twitter": "@satlayer", "website": "satlayer.xyz", "category": "Bitcoin L2"},
-            {"name": "Sidekick", "twitter": "@Sidekick_Labs", "website": "N/A", "category": "Developer Tools"},
-            {"name": "Somnia", "twitter": "@Somnia_Network", "website": "somnia.network", "category": "Virtual Society"},
-            {"name": "Soul Protocol", "twitter": "@DigitalSoulPro", "website": "digitalsoulprotocol.com", "category": "Digital Identity"},
-            {"name": "Succinct", "twitter": "@succinctlabs", "website": "succinct.xyz", "category": "Zero-Knowledge"},
-            {"name": "Symphony", "twitter": "@SymphonyFinance", "website": "app.symphony.finance", "category": "Yield Farming"},
-            {"name": "Theoriq", "twitter": "@theoriq_ai", "website": "theoriq.ai", "category": "AI Agents"},
-            {"name": "Thrive Protocol", "twitter": "@thriveprotocol", "website": "thriveprotocol.com", "category": "Social DeFi"},
-            {"name": "Union", "twitter": "@union_build", "website": "union.build", "category": "Cross-Chain Infrastructure"},
-            {"name": "YEET", "twitter": "@yeet", "website": "yeet.com", "category": "Meme + Utility"},
-    # Add all other projects here
-]
-
-TWITTER_ACCOUNTS = [
-    "0x_ultra", "0xBreadguy", "beast_ico", "mdudas", "lex_node",
-            "jessepollak", "0xWenMoon", "ThinkingUSD", "udiWertheimer",
-            "vohvohh", "NTmoney", "0xMert_", "QwQiao", "DefiIgnas",
-            "notthreadguy", "Chilearmy123", "Punk9277", "DeeZe", "stevenyuntcap",
-            "chefcryptoz", "ViktorBunin", "ayyyeandy", "andy8052", "Phineas_Sol",
-            "MoonOverlord", "NarwhalTan", "theunipcs", "RyanWatkins_",
-            "aixbt_agent", "ai_9684xtpa", "icebergy_", "Luyaoyuan1",
-            "stacy_muur", "TheOneandOmsy", "jeffthedunker", "JoshuaDeuk",
-            "0x_scientist", "inversebrah", "dachshundwizard", "gammichan",
-            "sandeepnailwal", "segall_max", "blknoiz06", "0xmons", "hosseeb",
-            "GwartyGwart", "JasonYanowitz", "Tyler_Did_It", "laurashin",
-            "Dogetoshi", "benbybit", "MacroCRG", "Melt_Dem"
-]
-
-def run_bot():
-    """Main function to run the bot tasks"""
+load_config()
+
+RUNS = metrics.counter("bot_runs_total", "Bot runs by result")
+WATCH_REPLY_LATENCY = metrics.histogram(
+    "watch_reply_latency_seconds", "Time from detecting a new tweet to our reply being acknowledged",
+    buckets=(5, 10, 20, 30, 60, 120, 300, 600))
+WATCH_SLO = metrics.counter("watch_reply_slo_total", "Watch-mode replies by whether they met the latency SLO")
+
+KEEPALIVE_MINUTES = int(os.getenv("SESSION_KEEPALIVE_MINUTES", "30"))
+# Watch mode polls the accounts continuously between the scheduled runs and replies within seconds
+WATCH_MODE = os.getenv("WATCH_MODE", "false").lower() == "true"
+WATCH_REPLY_SLO = float(os.getenv("WATCH_REPLY_SLO_SECONDS", "120"))
+
+def run_bot(twitter_client=None, queue=None, dedup_index=None, comment_memo=None):
+    """Main function to run the bot tasks
+
+    Watch mode passes in its logged-in client and open stores, so the run
+    shares the watcher's browser instead of starting a second Playwright on
+    the same thread. Whatever is passed in is left open.
+    """
+    opened = []
+    if queue is None:
+        queue = WorkQueue()
+        opened.append(queue)
+    if dedup_index is None:
+        dedup_index = DuplicateIndex()
+        opened.append(dedup_index)
+    if comment_memo is None:
+        comment_memo = CommentMemo()
+        opened.append(comment_memo)
+    own_client = twitter_client is None
+    metrics.set_status("run_in_progress", True)
     try:
         logger.info("Starting bot run")
+        targets = get_catalog()
+
+        # Resume an interrupted run before planning a new one
+        run_id = queue.pending_run()
+        if run_id:
+            logger.info(f"Resuming unfinished run {run_id}")
+        else:
+            run_id = plan_run(queue, targets)
         
-        # Initialize clients
-        twitter_client = TwitterClient()
-        gemini_client = GeminiClient()
+        # Initialize clients; the Gemini client and its channel are shared by every run
+        if own_client:
+            twitter_client = TwitterClient()
+        gemini_client = gemini.get_client(dedup_index=dedup_index, comment_memo=comment_memo)
         
-        # Login to Twitter
-        twitter_client.login()
+        # Login to Twitter; without a session every action would fail, so leave the run for later
+        if not twitter_client.is_logged_in and not twitter_client.login():
+            raise RuntimeError(f"Login failed, leaving run {run_id} pending")
         
-        # Post project tweets
-        if random.random() < 0.85:  # 85% chance to post project tweets
-            selected_projects = random.sample(PROJECTS, min(2, len(PROJECTS)))
-            for project in selected_projects:
-                try:
-                    tweet_content = gemini_client.generate_project_tweet(project)
-                    twitter_client.post_tweet(tweet_content)
-                    logger.info(f"Posted tweet about {project['name']}")
-                    time.sleep(random.uniform(5, 10))
-                except Exception as e:
-                    logger.error(f"Error posting tweet for {project['name']}: {str(e)}")
-          # Comment on tweets
-        if random.random() < 0.7:  # 70% chance to comment on tweets
-            selected_accounts = random.sample(TWITTER_ACCOUNTS, min(15, len(TWITTER_ACCOUNTS)))
-            for username in selected_accounts:
-                try:
-                    latest_tweet = twitter_client.get_latest_tweet(username)
-                    if latest_tweet:
-                        comment = gemini_client.generate_comment(username, latest_tweet)
-                        twitter_client.post_comment(latest_tweet["url"], comment)
-                        logger.info(f"Commented on tweet by @{username}")
-                        time.sleep(random.uniform(3, 7))
-                except Exception as e:
-                    logger.error(f"Error commenting on @{username}'s tweet: {str(e)}")
+        process_actions(queue, queue.pending_actions(run_id), twitter_client, gemini_client, dedup_index, targets)
+        
+        if queue.finish_run(run_id):
+            record_outcomes(queue, run_id, targets)
         
-        # Close client
-        twitter_client.close()
+        # Close the browser
+        if own_client:
+            twitter_client.close()
+        metrics.set_status("last_successful_run", time.time())
+        RUNS.inc(result="success")
         logger.info("Bot run completed successfully")
     
     except Exception as e:
         logger.error(f"Bot run failed with error: {str(e)}")
+        RUNS.inc(result="failure")
         # Try to close browser if it's open
         try:
-            if 'twitter_client' in locals():
+            if own_client and twitter_client is not None:
                 twitter_client.close()
         except:
             pass
+    finally:
+        for store in opened:
+            store.close()
+        metrics.set_status("run_in_progress", False)
+
+def watch_reply(queue, tweet, twitter_client, gemini_client, dedup_index):
+    """Reply to a freshly detected tweet and record the detection-to-reply latency"""
+    run_id = queue.plan_run([], [tweet["username"]])
+    action = queue.pending_actions(run_id)[0]
+    action["tweet"] = tweet
+    queue.save_tweet(action["action_id"], tweet)
+    try:
+        posted = process_comment(queue, action, twitter_client, gemini_client, dedup_index, pause=False)
+        BROWSER_BREAKER.record_success()
+    except Exception as e:
+        # A late reply is worth little, so it is not retried by the next run
+        logger.error(f"Error replying to @{tweet['username']}: {str(e)}")
+        queue.mark_skipped(action["action_id"], f"watch reply failed: {str(e)}")
+        ACTION_FAILURES.inc(kind="comment")
+        BROWSER_BREAKER.record_failure(e)
+        posted = False
+    queue.finish_run(run_id)
+    if posted:
+        latency = time.time() - tweet["detected_at"]
+        WATCH_REPLY_LATENCY.observe(latency)
+        WATCH_SLO.inc(result="met" if latency <= WATCH_REPLY_SLO else "missed")
+        logger.info(f"Replied to @{tweet['username']} {latency:.1f} seconds after detection")
+
+def save_watch_session(watcher):
+    """Save the watcher's cookies; stands in for the keep-alive, whose Playwright would clash with the watcher's"""
+    if watcher.twitter_client is None:
+        return
+    try:
+        watcher.twitter_client.save_session()
+    except Exception as e:
+        logger.error(f"Saving the watch session failed: {str(e)}")
+
+def rebuild_watch_client(watcher):
+    """Replace a dead watcher browser with a fresh, logged-in client"""
+    if watcher.twitter_client is not None:
+        watcher.twitter_client.close()
+        watcher.twitter_client = None
+    watcher.twitter_client = TwitterClient()
+    if not watcher.twitter_client.login():
+        raise RuntimeError("Login failed")
+    logger.info("Watch browser rebuilt")
+
+def run_watch_loop():
+    """Poll watched accounts round-robin and reply as soon as a new tweet appears
+
+    The watcher's browser is the only one in the process: the scheduled runs
+    are registered here and reuse its client and stores, since a second sync
+    Playwright on this thread would fail and a second login would race on the
+    session file. When the browser circuit opens, the client is dropped and
+    rebuilt by the half-open probe.
+    """
+    queue = WorkQueue()
+    dedup_index = DuplicateIndex()
+    comment_memo = CommentMemo()
+    gemini_client = gemini.get_client(dedup_index=dedup_index, comment_memo=comment_memo)
+    watcher = AccountWatcher(TwitterClient(), lambda: get_catalog().account_handles)
+    shared_run = lambda: run_bot(watcher.twitter_client, queue, dedup_index, comment_memo)
+    logger.info(f"Watch mode started, polling one account every {watcher.interval:.0f} seconds")
+    try:
+        if not watcher.twitter_client.login():
+            raise RuntimeError("Login failed")
+        schedule.every(2).hours.do(shared_run)
+        schedule.every(KEEPALIVE_MINUTES).minutes.do(save_watch_session, watcher)
+        shared_run()
+        while True:
+            schedule.run_pending()
+            started = time.monotonic()
+            if BROWSER_BREAKER.allow():
+                try:
+                    if watcher.twitter_client is None:
+                        rebuild_watch_client(watcher)
+                    tweet = watcher.poll_next()
+                    BROWSER_BREAKER.record_success()
+                except Exception as e:
+                    logger.error(f"Watch poll failed: {str(e)}")
+                    BROWSER_BREAKER.record_failure(e)
+                    tweet = None
+                    if BROWSER_BREAKER.is_open() and watcher.twitter_client is not None:
+                        logger.warning("Browser circuit opened, closing the watch browser until the next probe")
+                        watcher.twitter_client.close()
+                        watcher.twitter_client = None
+                if tweet and not queue.is_posted(tweet["url"]):
+                    watch_reply(queue, tweet, watcher.twitter_client, gemini_client, dedup_index)
+            time.sleep(max(0, watcher.interval - (time.monotonic() - started)))
+    finally:
+        if watcher.twitter_client is not None:
+            watcher.twitter_client.close()
+        queue.close()
+        dedup_index.close()
+        comment_memo.close()
+
+def run_keepalive(keepalive):
+    """Scheduled idle-time session check; never lets an error stop the scheduler"""
+    try:
+        keepalive.check()
+    except Exception as e:
+        logger.error(f"Session keep-alive failed: {str(e)}")
 
 def main():
     """Schedule the bot to run every 2 hours"""
+    # Start importing Playwright and Gemini first; the setup below never touches them
+    warm_up = warm_up_imports()
     logger.info("Bot started, scheduling runs every 2 hours")
+    start_health_server()
     
-    # Run once immediately
-    run_bot()
+    if WATCH_MODE:
+        warm_up.join()
+        try:
+            # Runs the scheduled jobs itself, with the watcher's browser
+            run_watch_loop()
+        except Exception as e:
+            logger.error(f"Watch mode stopped, continuing with scheduled runs only: {str(e)}")
+            schedule.clear()
     
     # Schedule to run every 2 hours
     schedule.every(2).hours.do(run_bot)
     
+    # Keep the session warm while idle so runs rarely need a full login
+    keepalive = SessionKeepAlive(TwitterClient)
+    schedule.every(KEEPALIVE_MINUTES).minutes.do(run_keepalive, keepalive)
+    
+    # Run once immediately, after the warm-up so the run does not queue on its import locks
+    warm_up.join()
+    run_bot()
+    
     # Keep the script running
     while True:
         schedule.run_pending()
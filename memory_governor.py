@@ -0,0 +1,138 @@
+import os
+import time
+import logging
+import metrics
+
+logger = logging.getLogger(__name__)
+
+MEMORY_GAUGE = metrics.gauge("browser_memory_mb", "Browser memory usage in MB")
+RECYCLES = metrics.counter("browser_recycles_total", "Page and context recycles")
+
+class MemoryGovernor:
+    """Watch browser memory and recycle the page or context before it grows too large
+
+    With a shared browser only the JS heap is checked: its processes are not
+    our children, and their RSS belongs to every worker's contexts.
+    """
+
+    def __init__(self, twitter_client):
+        self.client = twitter_client
+        self.heap_limit_mb = float(os.getenv("BROWSER_HEAP_LIMIT_MB", "200"))
+        self.rss_limit_mb = float(os.getenv("BROWSER_RSS_LIMIT_MB", "400"))
+        self.min_interval = float(os.getenv("BROWSER_MEMORY_CHECK_INTERVAL", "10"))
+        self.measure_rss = getattr(twitter_client, "shared_browser", None) is None
+        self.cdp_session = None
+        self.last_check = 0.0
+        self.metrics = {
+            "js_heap_used_mb": 0.0,
+            "js_heap_total_mb": 0.0,
+            "browser_rss_mb": 0.0,
+            "page_recycles": 0,
+            "context_recycles": 0,
+        }
+
+    def _cdp(self):
+        if self.cdp_session is None:
+            self.cdp_session = self.client.context.new_cdp_session(self.client.page)
+            self.cdp_session.send("Performance.enable")
+        return self.cdp_session
+
+    def sample(self):
+        """Refresh memory metrics for the current page and browser processes"""
+        try:
+            result = self._cdp().send("Performance.getMetrics")
+            values = {m["name"]: m["value"] for m in result.get("metrics", [])}
+            self.metrics["js_heap_used_mb"] = values.get("JSHeapUsedSize", 0) / 1048576
+            self.metrics["js_heap_total_mb"] = values.get("JSHeapTotalSize", 0) / 1048576
+        except Exception as e:
+            logger.debug(f"Could not read CDP performance metrics: {str(e)}")
+            self.cdp_session = None
+        MEMORY_GAUGE.set(self.metrics["js_heap_used_mb"], kind="js_heap_used")
+        if self.measure_rss:
+            self.metrics["browser_rss_mb"] = _children_rss_mb(os.getpid())
+            MEMORY_GAUGE.set(self.metrics["browser_rss_mb"], kind="rss")
+        return dict(self.metrics)
+
+    def check(self):
+        """Sample memory and recycle the page or context if a limit is exceeded"""
+        if self.client.page is None or time.time() - self.last_check < self.min_interval:
+            return
+        self.last_check = time.time()
+        metrics = self.sample()
+        if self.measure_rss:
+            logger.info(f"Browser memory: heap {metrics['js_heap_used_mb']:.0f} MB, "
+                        f"RSS {metrics['browser_rss_mb']:.0f} MB")
+        else:
+            logger.info(f"Browser memory: heap {metrics['js_heap_used_mb']:.0f} MB (shared browser, RSS not checked)")
+
+        if self.measure_rss and metrics["browser_rss_mb"] > self.rss_limit_mb:
+            logger.warning(f"Browser RSS {metrics['browser_rss_mb']:.0f} MB over limit "
+                           f"{self.rss_limit_mb:.0f} MB, recycling context")
+            self.recycle_context()
+        elif metrics["js_heap_used_mb"] > self.heap_limit_mb:
+            logger.warning(f"JS heap {metrics['js_heap_used_mb']:.0f} MB over limit "
+                           f"{self.heap_limit_mb:.0f} MB, recycling page")
+            self.recycle_page()
+
+    def recycle_page(self):
+        """Replace the page with a fresh one in the same context"""
+        old_page = self.client.page
+        self.client.page = self.client._new_page()
+        self.cdp_session = None
+        try:
+            old_page.close()
+        except Exception as e:
+            logger.debug(f"Error closing old page: {str(e)}")
+        self.metrics["page_recycles"] += 1
+        RECYCLES.inc(scope="page")
+        logger.info("Browser page recycled")
+
+    def recycle_context(self):
+        """Replace the context with a fresh one carrying over cookies and storage"""
+        old_context = self.client.context
+        storage_state = old_context.storage_state()
+        self.client.context = self.client._new_context(storage_state)
+        self.client.page = self.client._new_page()
+        self.cdp_session = None
+        try:
+            old_context.close()
+        except Exception as e:
+            logger.debug(f"Error closing old context: {str(e)}")
+        self.metrics["context_recycles"] += 1
+        RECYCLES.inc(scope="context")
+        logger.info("Browser context recycled with preserved storage state")
+
+def _children_rss_mb(root_pid):
+    """Sum resident memory of all descendant processes using /proc (Linux only)"""
+    try:
+        parents = {}
+        rss_pages = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    stat = f.read()
+                # The command name may contain spaces, so split after the closing paren
+                fields = stat[stat.rindex(")") + 2:].split()
+                parents[int(entry)] = int(fields[1])
+                rss_pages[int(entry)] = int(fields[21])
+            except (OSError, ValueError, IndexError):
+                continue
+    except OSError:
+        return 0.0
+
+    children = {}
+    for child, parent in parents.items():
+        children.setdefault(parent, []).append(child)
+
+    descendants = set()
+    frontier = [root_pid]
+    while frontier:
+        for child in children.get(frontier.pop(), []):
+            if child not in descendants:
+                descendants.add(child)
+                frontier.append(child)
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    return sum(rss_pages.get(pid, 0) for pid in descendants) * page_size / 1048576
@@ -0,0 +1,133 @@
+import time
+import threading
+
+_lock = threading.Lock()
+_registry = {}
+_status = {}
+
+class Counter:
+    """Monotonically increasing value, optionally split by labels"""
+    type_name = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with _lock:
+            return self.values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self):
+        # Snapshot under the lock; other threads keep adding label sets while we render
+        with _lock:
+            values = list(self.values.items())
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in values]
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self.values[key] = value
+
+class Histogram:
+    """Cumulative bucketed distribution of observed values"""
+    type_name = "histogram"
+
+    DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            series = self.series.setdefault(key, {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def time(self, **labels):
+        """Context manager that observes the elapsed time of its block"""
+        return _Timer(self, labels)
+
+    def render(self):
+        with _lock:
+            snapshot = [(key, dict(series, counts=list(series["counts"]))) for key, series in self.series.items()]
+        lines = []
+        for key, series in snapshot:
+            for bound, count in zip(self.buckets, series["counts"]):
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', str(bound)),))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.monotonic() - self.start
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+def _format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in key) + "}"
+
+def _register(metric):
+    with _lock:
+        return _registry.setdefault(metric.name, metric)
+
+def counter(name, help_text):
+    """Get or create a counter"""
+    return _register(Counter(name, help_text))
+
+def gauge(name, help_text):
+    """Get or create a gauge"""
+    return _register(Gauge(name, help_text))
+
+def histogram(name, help_text, buckets=Histogram.DEFAULT_BUCKETS):
+    """Get or create a histogram"""
+    return _register(Histogram(name, help_text, buckets))
+
+def render_prometheus():
+    """Render every registered metric in the Prometheus text format"""
+    lines = []
+    with _lock:
+        metrics = list(_registry.values())
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def set_status(key, value):
+    """Record a readiness signal such as browser_alive or session_valid"""
+    with _lock:
+        _status[key] = value
+
+def get_status():
+    """Return a snapshot of all readiness signals"""
+    with _lock:
+        return dict(_status)
@@ -0,0 +1,127 @@
+import os
+import time
+import logging
+from dataclasses import dataclass, field
+import metrics
+
+logger = logging.getLogger(__name__)
+
+POST_CONFIRMATIONS = metrics.counter("twitter_post_confirmations_total", "Post acknowledgements by kind and result")
+POST_ACK_LATENCY = metrics.histogram("twitter_post_ack_seconds", "Time from clicking post to the CreateTweet response")
+
+CREATE_TWEET_PATH = "/CreateTweet"
+
+# X API error codes that mean the post was rejected and retrying now will not help
+REJECTION_REASONS = {
+    88: "rate_limited",
+    185: "rate_limited",
+    186: "too_long",
+    187: "duplicate",
+    226: "automation_suspected",
+    326: "account_locked",
+    344: "daily_limit",
+}
+
+@dataclass
+class PostResult:
+    """Outcome of a post; truthy only when the server acknowledged every tweet"""
+    ok: bool
+    tweet_id: str = None
+    url: str = None
+    reason: str = None
+    tweet_ids: list = field(default_factory=list)
+
+    def __bool__(self):
+        return self.ok
+
+def status_url(tweet_id, screen_name=None):
+    """Return the public URL of a tweet"""
+    screen_name = screen_name or os.getenv("TWITTER_USERNAME") or "i/web"
+    return f"https://x.com/{screen_name}/status/{tweet_id}"
+
+def parse_create_tweet(status, body):
+    """Return (tweet_id, screen_name, reason) from a CreateTweet response"""
+    if status == 429:
+        return None, None, "rate_limited"
+    errors = (body or {}).get("errors") or []
+    if errors:
+        code = errors[0].get("code")
+        return None, None, REJECTION_REASONS.get(code, f"error_{code}")
+    result = (((body or {}).get("data") or {}).get("create_tweet") or {}).get("tweet_results", {}).get("result") or {}
+    tweet_id = result.get("rest_id")
+    if not tweet_id:
+        return None, None, f"http_{status}" if status >= 400 else "no_tweet_id"
+    user = (((result.get("core") or {}).get("user_results") or {}).get("result") or {}).get("legacy") or {}
+    return tweet_id, user.get("screen_name"), None
+
+class PostConfirmation:
+    """Wait for the CreateTweet responses triggered by clicking post
+
+    Call start() before clicking and wait() afterwards. Responses are only
+    collected in the event handler and parsed in wait(), so no Playwright call
+    is made from inside an event callback.
+    """
+
+    def __init__(self, page, kind, timeout=None):
+        self.page = page
+        self.kind = kind
+        self.timeout = float(timeout or os.getenv("POST_CONFIRM_TIMEOUT", "20"))
+        self.responses = []
+        self.started_at = None
+
+    def _on_response(self, response):
+        if CREATE_TWEET_PATH in response.url and response.request.method == "POST":
+            self.responses.append(response)
+
+    def start(self):
+        self.responses = []
+        self.started_at = time.monotonic()
+        self.page.on("response", self._on_response)
+        return self
+
+    def stop(self):
+        if self.started_at is not None:
+            self.page.remove_listener("response", self._on_response)
+            self.started_at = None
+
+    def wait(self, expected=1):
+        """Wait until expected tweets are acknowledged, one is rejected, or the deadline passes"""
+        started_at = self.started_at
+        deadline = started_at + self.timeout
+        tweet_ids = []
+        screen_name = None
+        parsed = 0
+        try:
+            while True:
+                while parsed < len(self.responses):
+                    response = self.responses[parsed]
+                    parsed += 1
+                    try:
+                        body = response.json()
+                    except Exception:
+                        body = None
+                    tweet_id, name, reason = parse_create_tweet(response.status, body)
+                    if reason:
+                        logger.error(f"Post rejected by server: {reason}")
+                        POST_CONFIRMATIONS.inc(kind=self.kind, result=reason)
+                        return PostResult(False, reason=reason, tweet_ids=tweet_ids)
+                    tweet_ids.append(tweet_id)
+                    screen_name = screen_name or name
+                if len(tweet_ids) >= expected:
+                    break
+                if time.monotonic() >= deadline:
+                    logger.error(f"No CreateTweet response within {self.timeout:.0f} seconds "
+                                 f"({len(tweet_ids)}/{expected} acknowledged)")
+                    POST_CONFIRMATIONS.inc(kind=self.kind, result="timeout")
+                    return PostResult(False, reason="timeout", tweet_ids=tweet_ids)
+                # Lets Playwright dispatch pending response events
+                self.page.wait_for_timeout(100)
+        finally:
+            self.stop()
+
+        elapsed = time.monotonic() - started_at
+        POST_ACK_LATENCY.observe(elapsed, kind=self.kind)
+        POST_CONFIRMATIONS.inc(kind=self.kind, result="ok")
+        url = status_url(tweet_ids[0], screen_name)
+        logger.info(f"Server acknowledged {len(tweet_ids)} tweet(s) in {elapsed:.2f} seconds: {url}")
+        return PostResult(True, tweet_id=tweet_ids[0], url=url, tweet_ids=tweet_ids)
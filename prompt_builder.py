@@ -0,0 +1,105 @@
+import os
+import re
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Static instructions; sent once as a system instruction where the SDK supports it
+PROJECT_INSTRUCTION = (
+    "You are a Web3 and blockchain expert writing English tweets about projects. "
+    "Write authentic, human-sounding, analytical content (not promotional) in your own words, "
+    "connect it to current Web3 trends and include a thought-provoking question or highlight. "
+    "Use at most 2 emojis. Going over 280 characters is fine, it will be posted as a thread. "
+    "End with the project website on its own line. Reply with the tweet text only."
+)
+COMMENT_INSTRUCTION = (
+    "You write replies to tweets. The reply must be relevant, add value, be engaging but "
+    "professional, may ask a thoughtful question, stay under 280 characters, avoid generic "
+    "phrases, be neither overly positive nor negative and use at most 1-2 emojis. "
+    "Reply with the comment text only."
+)
+
+INSTRUCTIONS = {
+    "project_tweet": PROJECT_INSTRUCTION,
+    "comment": COMMENT_INSTRUCTION,
+}
+
+# Separates alternative replies when several are requested in one call
+ALTERNATIVES_SEPARATOR = "---"
+
+URL_PATTERN = re.compile(r"https?://\S+")
+INVISIBLE_PATTERN = re.compile("[\u200b-\u200f\u2060\ufeff]")
+# Lines left over from a whole-article inner_text(): handles, "·", relative times, counts
+NOISE_LINE_PATTERN = re.compile(r"^(@\w+|·|\d+[smhd]|[A-Z][a-z]{2} \d{1,2}(, \d{4})?|[\d.,]+[KMB]?)$")
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def estimate_tokens(text):
+    """Approximate the model's token count locally; words longer than 4 characters count per 4"""
+    return sum(math.ceil(len(token) / 4) for token in TOKEN_PATTERN.findall(text))
+
+def normalize_text(text):
+    """Strip links, invisible characters and timeline chrome, and collapse whitespace"""
+    text = INVISIBLE_PATTERN.sub("", URL_PATTERN.sub("", text or ""))
+    lines = [line.strip() for line in text.splitlines()]
+    lines = [line for line in lines if line and not NOISE_LINE_PATTERN.match(line)]
+    return re.sub(r"\s+", " ", " ".join(lines)).strip()
+
+def split_alternatives(text):
+    """Split a response holding several replies into the individual replies"""
+    parts = re.split(rf"^\s*{re.escape(ALTERNATIVES_SEPARATOR)}\s*$", text, flags=re.MULTILINE)
+    return [part.strip() for part in parts if part.strip()]
+
+def truncate_to_budget(text, budget):
+    """Cut text at a word boundary so it fits within budget estimated tokens"""
+    if estimate_tokens(text) <= budget:
+        return text
+    words = text.split(" ")
+    low, high = 0, len(words)
+    # Binary search for the longest prefix of words that fits
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(" ".join(words[:middle])) + 1 <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low]) + "..."
+
+class PromptBuilder:
+    """Build compact prompts: static instructions kept apart from small, budgeted inputs
+
+    When system instructions are not supported the instruction is prepended
+    to every prompt instead.
+    """
+
+    def __init__(self, system_instructions=False):
+        self.system_instructions = system_instructions
+        self.tweet_budget = int(os.getenv("PROMPT_TWEET_TOKEN_BUDGET", "200"))
+        self.field_budget = int(os.getenv("PROMPT_FIELD_TOKEN_BUDGET", "24"))
+
+    def _finish(self, kind, body):
+        if self.system_instructions:
+            return body
+        return f"{INSTRUCTIONS[kind]}\n\n{body}"
+
+    def _field(self, value):
+        return truncate_to_budget(re.sub(r"\s+", " ", str(value)).strip(), self.field_budget)
+
+    def project_prompt(self, project):
+        """Return the prompt for a project tweet"""
+        body = (
+            f"Project: {self._field(project['name'])}\n"
+            f"Twitter: {self._field(project['twitter'])}\n"
+            f"Category: {self._field(project['category'])}\n"
+            f"Website: {project['website']}"
+        )
+        return self._finish("project_tweet", body)
+
+    def comment_prompt(self, username, text, alternatives=1):
+        """Return the prompt for a reply (or several alternative replies) to a tweet by username"""
+        tweet = truncate_to_budget(normalize_text(text), self.tweet_budget)
+        body = f"Tweet by @{username}:\n{tweet}"
+        if alternatives > 1:
+            body += (f"\n\nWrite {alternatives} clearly different replies, "
+                     f"separated by lines containing only {ALTERNATIVES_SEPARATOR}")
+        return self._finish("comment", body)
@@ -0,0 +1,68 @@
+import re
+import math
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "is", "are", "it", "this",
+    "that", "with", "at", "by", "be", "as", "from", "we", "you", "i", "my", "our", "your",
+    "https", "http", "t", "co", "com", "xyz", "www",
+}
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+class RelevanceRanker:
+    """BM25 index over our topics (projects and past engagement) used to rank scraped tweets"""
+
+    def __init__(self, projects, engaged_texts=(), k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        documents = []
+        for project in projects:
+            handle = project["twitter"].lstrip("@")
+            text = f"{project['name']} {handle} {project['category']} {project['website']}"
+            documents.append((tokenize(text), 1.0))
+        # Tweets we already engaged with count, but less than our own topics
+        for text in engaged_texts:
+            documents.append((tokenize(text), 0.5))
+
+        self.doc_weights = []
+        self.doc_lengths = []
+        self.postings = {}
+        for doc_id, (tokens, weight) in enumerate(documents):
+            self.doc_weights.append(weight)
+            self.doc_lengths.append(len(tokens))
+            for term, freq in Counter(tokens).items():
+                self.postings.setdefault(term, []).append((doc_id, freq))
+
+        count = len(documents)
+        self.avg_length = (sum(self.doc_lengths) / count) if count else 0.0
+        self.idf = {
+            term: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+        logger.info(f"Built relevance index with {count} documents and {len(self.postings)} terms")
+
+    def score(self, text):
+        """Score a tweet by its BM25 match against the best matching topic document"""
+        doc_scores = {}
+        for term, query_freq in Counter(tokenize(text)).items():
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, freq in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length)
+                term_score = idf * freq * (self.k1 + 1) / (freq + norm)
+                doc_scores[doc_id] = doc_scores.get(doc_id, 0.0) + term_score * self.doc_weights[doc_id]
+        return max(doc_scores.values(), default=0.0)
+
+    def rank(self, items, text_key, top_k):
+        """Return (kept, dropped) lists of (score, item), keeping the top_k highest scoring"""
+        scored = sorted(((self.score(text_key(item)), item) for item in items),
+                        key=lambda pair: pair[0], reverse=True)
+        return scored[:top_k], scored[top_k:]
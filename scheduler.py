@@ -0,0 +1,125 @@
+import time
+import heapq
+import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+ENGAGEMENT_DECAY = 0.8
+
+class FairScheduler:
+    """Stride scheduler over targets with cooldowns and engagement-adjusted weights
+
+    Every target has a virtual time ("pass"). Selection takes the targets with the
+    lowest pass that are not in cooldown, then advances each one by 1 / weight, so
+    over many runs a target is picked in proportion to its weight and none starve.
+    State is kept in SQLite so fairness carries across runs and restarts; pass a
+    fake clock and an in-memory connection to simulate thousands of runs.
+    """
+
+    def __init__(self, conn, clock=time.time):
+        self.conn = conn
+        self.clock = clock
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS schedule_state (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                pass REAL NOT NULL,
+                last_used REAL NOT NULL,
+                engagement REAL NOT NULL,
+                PRIMARY KEY (kind, key)
+            )
+        """)
+        self.reload()
+
+    def reload(self):
+        """Re-read the saved state, e.g. after another worker process planned a run"""
+        self.state = {}
+        for kind, key, pass_value, last_used, engagement in self.conn.execute(
+                "SELECT kind, key, pass, last_used, engagement FROM schedule_state"):
+            self.state[(kind, key)] = [pass_value, last_used, engagement]
+        self.virtual_time = {}
+        self.heaps = {}
+
+    def _weight(self, kind, entry, key):
+        engagement = self.state[(kind, key)][2]
+        # Neutral engagement (0.5) keeps the configured weight unchanged
+        return max(float(entry.get("weight", 1)), 1e-6) * (0.5 + engagement)
+
+    def _heap(self, kind, entries, key_field):
+        cached = self.heaps.get(kind)
+        if cached is not None and cached[0] is entries:
+            return cached[1]
+        # New targets start at the current virtual time so they neither starve nor flood
+        start = min((self.state[(kind, entry[key_field])][0] for entry in entries
+                     if (kind, entry[key_field]) in self.state), default=0.0)
+        start = self.virtual_time.get(kind, start)
+        heap = []
+        added = []
+        for index, entry in enumerate(entries):
+            if (kind, entry[key_field]) not in self.state:
+                added.append(entry[key_field])
+            state = self.state.setdefault((kind, entry[key_field]), [start, 0.0, 0.5])
+            heap.append((state[0], random.random(), index))
+        heapq.heapify(heap)
+        # Save new targets' starting pass too, or a reload would start them over at the current minimum
+        self._save(kind, added)
+        self.heaps[kind] = (entries, heap)
+        return heap
+
+    def select(self, kind, entries, key_field, k):
+        """Pick up to k entries, lowest virtual time first, skipping those in cooldown"""
+        heap = self._heap(kind, entries, key_field)
+        now = self.clock()
+        chosen = []
+        deferred = []
+        while heap and len(chosen) < k:
+            pass_value, tiebreak, index = heapq.heappop(heap)
+            entry = entries[index]
+            key = entry[key_field]
+            state = self.state[(kind, key)]
+            cooldown = float(entry.get("cooldown_hours", 0)) * 3600
+            if now - state[1] < cooldown:
+                deferred.append((pass_value, tiebreak, index))
+                continue
+            self.virtual_time[kind] = pass_value
+            state[0] = pass_value + 1.0 / self._weight(kind, entry, key)
+            state[1] = now
+            chosen.append(entry)
+            deferred.append((state[0], random.random(), index))
+        for item in deferred:
+            heapq.heappush(heap, item)
+        self._save(kind, [entry[key_field] for entry in chosen])
+        return chosen
+
+    def last_used(self, kind, key):
+        """Return when a target was last selected, by either selection mode"""
+        state = self.state.get((kind, key))
+        return state[1] if state else 0.0
+
+    def mark_used(self, kind, keys):
+        """Record targets picked outside select() so both modes share one cooldown clock"""
+        now = self.clock()
+        for key in keys:
+            state = self.state.get((kind, key))
+            if state is None:
+                start = self.virtual_time.get(kind, min(
+                    (value[0] for (state_kind, _), value in self.state.items() if state_kind == kind), default=0.0))
+                state = self.state[(kind, key)] = [start, 0.0, 0.5]
+            state[1] = now
+        self._save(kind, keys)
+
+    def record_outcome(self, kind, key, success):
+        """Fold a success or failure into the target's engagement score"""
+        state = self.state.get((kind, key))
+        if state is None:
+            return
+        state[2] = ENGAGEMENT_DECAY * state[2] + (1 - ENGAGEMENT_DECAY) * (1.0 if success else 0.0)
+        self._save(kind, [key])
+
+    def _save(self, kind, keys):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO schedule_state (kind, key, pass, last_used, engagement) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(kind, key, *self.state[(kind, key)]) for key in keys]
+        )
@@ -0,0 +1,89 @@
+import os
+import time
+import logging
+import metrics
+from session_store import SessionStore
+from utils import get_random_user_agent
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE_RESULTS = metrics.counter("session_keepalive_total", "Session keep-alive checks by result")
+SESSION_EXPIRY = metrics.gauge("session_auth_expiry_seconds", "Seconds until the auth cookie expires")
+
+AUTH_COOKIES = ("auth_token", "ct0")
+CHECK_URL = "https://x.com/settings/account"
+
+class SessionKeepAlive:
+    """Keep the stored session warm between runs so runs rarely need a full login
+
+    Each check replays the stored cookies in a lightweight Playwright request
+    context (no browser) against an authenticated page and saves any cookies
+    the server refreshes. If the session is invalid, or the auth cookie expires
+    within SESSION_REFRESH_HOURS, it logs in with a browser during idle time.
+    """
+
+    def __init__(self, client_factory, store=None):
+        self.client_factory = client_factory
+        self.store = store or SessionStore()
+        self.profile = os.getenv("TWITTER_PROFILE") or os.getenv("TWITTER_USERNAME") or "default"
+        self.refresh_window = float(os.getenv("SESSION_REFRESH_HOURS", "48")) * 3600
+
+    def seconds_until_expiry(self, state):
+        """Return seconds until the first auth cookie expires, or None if one is missing"""
+        expiries = {}
+        for cookie in state.get("cookies", []):
+            if cookie["name"] in AUTH_COOKIES:
+                expires = cookie.get("expires", -1)
+                expiries[cookie["name"]] = float("inf") if expires in (-1, None) else expires
+        if any(name not in expiries for name in AUTH_COOKIES):
+            return None
+        return min(expiries.values()) - time.time()
+
+    def ping(self, state):
+        """Make one cheap authenticated request; return (valid, refreshed state)"""
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as playwright:
+            api = playwright.request.new_context(storage_state=state, user_agent=get_random_user_agent())
+            try:
+                response = api.get(CHECK_URL, max_redirects=0, fail_on_status_code=False, timeout=20000)
+                location = response.headers.get("location", "")
+                valid = response.ok and "login" not in location
+                return valid, api.storage_state()
+            finally:
+                api.dispose()
+
+    def check(self):
+        """Ping the session and refresh it ahead of expiry; meant for idle time between runs"""
+        self.store.reload()  # Pick up whatever the last run saved
+        state = self.store.load(self.profile)
+        remaining = self.seconds_until_expiry(state) if state else None
+
+        valid = False
+        if remaining is not None and remaining > 0:
+            SESSION_EXPIRY.set(remaining)
+            try:
+                valid, refreshed = self.ping(state)
+                if valid:
+                    self.store.save(self.profile, refreshed)
+                    remaining = self.seconds_until_expiry(refreshed) or remaining
+            except Exception as e:
+                logger.error(f"Session keep-alive request failed: {str(e)}")
+                KEEPALIVE_RESULTS.inc(result="error")
+                return
+
+        if valid and remaining > self.refresh_window:
+            logger.info(f"Session valid, auth cookie expires in {remaining / 3600:.1f} hours")
+            KEEPALIVE_RESULTS.inc(result="valid")
+            metrics.set_status("session_valid", True)
+            return
+
+        logger.info("Session invalid or close to expiry, refreshing login during idle time")
+        KEEPALIVE_RESULTS.inc(result="refresh")
+        client = self.client_factory()
+        try:
+            if not client.login(force=True):
+                # close() only saves after a successful login, so the stored session is kept
+                logger.error("Idle-time login failed, keeping the stored session")
+                KEEPALIVE_RESULTS.inc(result="refresh_failed")
+        finally:
+            client.close()
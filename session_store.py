@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import logging
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Only state for these sites is needed to stay logged in
+SESSION_DOMAINS = ("twitter.com", "x.com")
+
+def _wanted_domain(domain):
+    domain = domain.lstrip(".").lower()
+    return any(domain == d or domain.endswith("." + d) for d in SESSION_DOMAINS)
+
+def compact_state(state):
+    """Drop expired cookies and cookies/origins for unrelated sites"""
+    now = time.time()
+    cookies = [
+        cookie for cookie in state.get("cookies", [])
+        if _wanted_domain(cookie.get("domain", ""))
+        and (cookie.get("expires", -1) in (-1, None) or cookie["expires"] > now)
+    ]
+    origins = [
+        origin for origin in state.get("origins", [])
+        if _wanted_domain(origin.get("origin", "").split("://", 1)[-1].split("/", 1)[0].split(":", 1)[0])
+    ]
+    return {"cookies": cookies, "origins": origins}
+
+class SessionStore:
+    """Named Playwright storage states in one file, written atomically and encrypted at rest
+
+    Set SESSION_ENCRYPTION_KEY to a Fernet key to encrypt the file. A legacy
+    single-session twitter_session.json is read as the current profile and
+    converted on the next save. A file that exists but cannot be read (wrong
+    or missing key, corrupt data) is never overwritten, since that would drop
+    every other profile's session.
+    """
+
+    def __init__(self, path=None, key=None):
+        self.path = path or os.getenv("SESSION_STORE", "twitter_session.json")
+        key = key or os.getenv("SESSION_ENCRYPTION_KEY")
+        self.fernet = None
+        if key:
+            from cryptography.fernet import Fernet
+            self.fernet = Fernet(key.encode() if isinstance(key, str) else key)
+        else:
+            logger.warning("SESSION_ENCRYPTION_KEY not set, session store is not encrypted")
+        self.profiles = None
+        self.unreadable = False
+
+    def reload(self):
+        """Forget the cached profiles so the next load sees what another process saved"""
+        self.profiles = None
+        self.unreadable = False
+
+    def _read(self):
+        if self.profiles is not None:
+            return self.profiles
+        self.profiles = {}
+        self.unreadable = False
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            logger.info("No session store found, will create new session")
+            return self.profiles
+
+        try:
+            if raw.startswith(b"{"):
+                data = json.loads(raw)
+            elif self.fernet:
+                data = json.loads(self.fernet.decrypt(raw))
+            else:
+                logger.error("Session store is encrypted but SESSION_ENCRYPTION_KEY is not set")
+                self.unreadable = True
+                return self.profiles
+        except Exception as e:
+            logger.error(f"Cannot read session store, will log in without it: {str(e)}")
+            self.unreadable = True
+            return self.profiles
+
+        if "cookies" in data:
+            # Legacy file holding a single storage state
+            self.profiles = {None: data}
+        else:
+            self.profiles = data.get("profiles", {})
+        return self.profiles
+
+    def load(self, profile):
+        """Return the storage state dict for a profile, or None"""
+        profiles = self._read()
+        state = profiles.get(profile) or profiles.get(None)
+        if state:
+            logger.info(f"Using stored session for profile {profile}")
+        return state
+
+    def save(self, profile, state):
+        """Store a profile's compacted storage state and rewrite the file atomically; return whether it was saved"""
+        profiles = self._read()
+        if self.unreadable:
+            logger.error(f"Not saving session for profile {profile}: {self.path} could not be read and "
+                         f"would lose the other profiles; fix SESSION_ENCRYPTION_KEY or remove the file")
+            return False
+        profiles.pop(None, None)
+        profiles[profile] = compact_state(state)
+        payload = json.dumps({"version": 1, "profiles": profiles}, separators=(",", ":")).encode("utf-8")
+        if self.fernet:
+            payload = self.fernet.encrypt(payload)
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".session-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        logger.info(f"Session for profile {profile} saved to {self.path} "
+                    f"({len(profiles[profile]['cookies'])} cookies)")
+        return True
@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import heapq
+import random
+import sqlite3
+import logging
+from scheduler import FairScheduler
+
+logger = logging.getLogger(__name__)
+
+class WeightedSampler:
+    """Fenwick tree over item weights for O(log n) weighted draws and updates"""
+
+    def __init__(self, weights):
+        self.size = len(weights)
+        self.weights = [0.0] * self.size
+        self.tree = [0.0] * (self.size + 1)
+        for index, weight in enumerate(weights):
+            self.update(index, weight)
+
+    def update(self, index, weight):
+        """Set the weight of one item"""
+        delta = weight - self.weights[index]
+        self.weights[index] = weight
+        position = index + 1
+        while position <= self.size:
+            self.tree[position] += delta
+            position += position & -position
+
+    def total(self):
+        total = 0.0
+        position = self.size
+        while position > 0:
+            total += self.tree[position]
+            position -= position & -position
+        return total
+
+    def find(self, target):
+        """Return the index whose cumulative weight range contains target"""
+        position = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            next_position = position + step
+            if next_position <= self.size and self.tree[next_position] <= target:
+                position = next_position
+                target -= self.tree[position]
+            step >>= 1
+        return min(position, self.size - 1)
+
+    def sample(self, k, rng=random):
+        """Draw up to k distinct indexes with probability proportional to weight"""
+        chosen = []
+        removed = []
+        for _ in range(k):
+            total = self.total()
+            if total <= 1e-12:
+                break
+            index = self.find(rng.uniform(0, total))
+            if self.weights[index] <= 0:
+                break
+            chosen.append(index)
+            removed.append((index, self.weights[index]))
+            self.update(index, 0.0)
+        # Restore the weights drawn without replacement
+        for index, weight in removed:
+            self.update(index, weight)
+        return chosen
+
+PROJECT_FIELDS = ("name", "twitter", "category", "website")
+
+def _validate(projects, accounts):
+    """Raise KeyError, TypeError or ValueError for entries the bot could not use"""
+    for project in projects:
+        missing = [field for field in PROJECT_FIELDS if field not in project]
+        if missing:
+            raise KeyError(f"project {project.get('name')!r} is missing {', '.join(missing)}")
+    for account in accounts:
+        if "handle" not in account:
+            raise KeyError(f"account {account!r} has no handle")
+    for entry in projects + accounts:
+        float(entry.get("weight", 1))
+        float(entry.get("cooldown_hours", 0))
+
+def _build_indexes(projects, accounts):
+    """Return (by name, by handle, by category, accounts by handle) lookups"""
+    by_name = {project["name"].lower(): project for project in projects}
+    by_handle = {project["twitter"].lstrip("@").lower(): project for project in projects}
+    by_category = {}
+    for project in projects:
+        by_category.setdefault(project["category"].lower(), []).append(project)
+    accounts_by_handle = {account["handle"].lower(): account for account in accounts}
+    return by_name, by_handle, by_category, accounts_by_handle
+
+def _cooldown(entry):
+    return float(entry.get("cooldown_hours", 0)) * 3600
+
+class TargetCatalog:
+    """Projects and accounts loaded from a JSON file, indexed and reloaded when it changes
+
+    Entries may set "weight" (default 1) and "cooldown_hours" (default 0).
+    TARGET_SELECTION picks "fair" (stride scheduling, the default) or "weighted"
+    (independent weighted draws each run). Both modes keep last-used times in
+    the scheduler's SQLite state, so cooldowns survive restarts and mode changes.
+    """
+
+    def __init__(self, path=None, state_db=None):
+        self.path = path or os.getenv("TARGETS_FILE", "targets.json")
+        self.state_db = state_db or os.getenv("WORK_QUEUE_DB", "bot_state.db")
+        self.conn = sqlite3.connect(self.state_db, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.selection = os.getenv("TARGET_SELECTION", "fair")
+        self.scheduler = FairScheduler(self.conn)
+        # Weighted mode keeps one sampler per kind and only updates the weights that change
+        self.samplers = {}
+        self.mtime = None
+        self.projects = []
+        self.accounts = []
+        (self.projects_by_name, self.projects_by_handle,
+         self.projects_by_category, self.accounts_by_handle) = _build_indexes([], [])
+        self.reload_if_changed()
+
+    def reload_if_changed(self):
+        """Reload the file if it was modified since the last load; return True if reloaded"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            logger.error(f"Cannot read targets file {self.path}: {str(e)}")
+            return False
+        if mtime == self.mtime:
+            return False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            projects = list(data.get("projects", []))
+            accounts = [{"handle": entry} if isinstance(entry, str) else entry
+                        for entry in data.get("accounts", [])]
+            _validate(projects, accounts)
+            indexes = _build_indexes(projects, accounts)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            # Keep serving the previous lists rather than failing the run
+            logger.error(f"Invalid targets file {self.path}, keeping previous lists: {str(e)}")
+            return False
+
+        # Swap everything in at once so a bad file never leaves the catalog half-replaced
+        self.projects = projects
+        self.accounts = accounts
+        (self.projects_by_name, self.projects_by_handle,
+         self.projects_by_category, self.accounts_by_handle) = indexes
+        self.mtime = mtime
+        logger.info(f"Loaded {len(self.projects)} projects and {len(self.accounts)} accounts from {self.path}")
+        return True
+
+    def project(self, name):
+        return self.projects_by_name.get(name.lower())
+
+    def project_by_handle(self, handle):
+        return self.projects_by_handle.get(handle.lstrip("@").lower())
+
+    def projects_in_category(self, category):
+        return self.projects_by_category.get(category.lower(), [])
+
+    def account(self, handle):
+        return self.accounts_by_handle.get(handle.lstrip("@").lower())
+
+    @property
+    def account_handles(self):
+        return [account["handle"] for account in self.accounts]
+
+    def _sampler(self, kind, entries, key_field):
+        """Return the kind's sampler and its heap of (cooldown end, index), building them on first use"""
+        cached = self.samplers.get(kind)
+        if cached is not None and cached[0] is entries:
+            return cached[1], cached[2]
+        now = time.time()
+        weights = []
+        cooling = []
+        for index, entry in enumerate(entries):
+            ready_at = self.scheduler.last_used(kind, entry[key_field]) + _cooldown(entry)
+            if now < ready_at:
+                weights.append(0.0)
+                cooling.append((ready_at, index))
+            else:
+                weights.append(float(entry.get("weight", 1)))
+        heapq.heapify(cooling)
+        sampler = WeightedSampler(weights)
+        self.samplers[kind] = (entries, sampler, cooling)
+        return sampler, cooling
+
+    def _sample(self, kind, entries, key_field, k):
+        sampler, cooling = self._sampler(kind, entries, key_field)
+        now = time.time()
+        # Only targets whose cooldown just ended or just started change weight
+        while cooling and cooling[0][0] <= now:
+            _, index = heapq.heappop(cooling)
+            sampler.update(index, float(entries[index].get("weight", 1)))
+        indexes = sampler.sample(k)
+        for index in indexes:
+            cooldown = _cooldown(entries[index])
+            if cooldown > 0:
+                sampler.update(index, 0.0)
+                heapq.heappush(cooling, (now + cooldown, index))
+        chosen = [entries[index] for index in indexes]
+        self.scheduler.mark_used(kind, [entry[key_field] for entry in chosen])
+        return chosen
+
+    def _select(self, kind, entries, key_field, k):
+        if self.selection == "weighted":
+            return self._sample(kind, entries, key_field, k)
+        return self.scheduler.select(kind, entries, key_field, k)
+
+    def sample_projects(self, k):
+        """Pick up to k projects by weight, skipping those in cooldown"""
+        return self._select("project", self.projects, "name", k)
+
+    def sample_accounts(self, k):
+        """Pick up to k account handles by weight, skipping those in cooldown"""
+        return [account["handle"] for account in self._select("account", self.accounts, "handle", k)]
+
+    def reload_state(self):
+        """Pick up scheduling state written by other worker processes since it was loaded"""
+        self.scheduler.reload()
+        self.samplers = {}
+
+    def record_outcome(self, kind, key, success):
+        """Feed engagement back into fair scheduling"""
+        self.scheduler.record_outcome(kind, key, success)
+
+    def close(self):
+        """Close the state database connection"""
+        self.conn.close()
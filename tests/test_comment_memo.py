@@ -0,0 +1,72 @@
+from comment_memo import CommentMemo, MEMO_LOOKUPS
+from dedup_index import DuplicateIndex
+from gemini_client import GeminiClient, FALLBACK_COMMENTS
+from prompt_builder import PromptBuilder, split_alternatives
+
+ANNOUNCEMENT = "Mainnet is live! Bridging from Ethereum now takes under a minute with fees cut by 90%. https://t.co/abc"
+REPLIES = [
+    "Sub-minute bridging is a real unlock for liquidity. How are you handling finality on the Ethereum side?",
+    "A 90% fee cut changes which apps are viable here. Curious which teams move over first.",
+    "Congrats on shipping mainnet. Would love to see the security assumptions behind the faster bridge.",
+    "Cheap bridging tends to pull in arbitrage before real users. What keeps the liquidity sticky?",
+]
+
+def alternatives(*replies):
+    return "\n---\n".join(replies)
+
+def make_client(tmp_path, responses, attempts=0):
+    client = GeminiClient.__new__(GeminiClient)
+    client.prompts = PromptBuilder()
+    client.dedup_index = DuplicateIndex(str(tmp_path / "state.db"))
+    client.comment_memo = CommentMemo(str(tmp_path / "state.db"))
+    client.dedup_attempts = attempts
+    client.comment_alternatives = 2
+    client.prompts_sent = []
+
+    def generate(prompt, kind):
+        client.prompts_sent.append(prompt)
+        return responses.pop(0)
+    client._generate = generate
+    return client
+
+def post(client, comment):
+    # What process_comment does once a reply is confirmed
+    client.dedup_index.add(comment, "comment")
+
+def test_split_alternatives():
+    assert split_alternatives("one\n---\ntwo\n  ---  \n\nthree\n---\n") == ["one", "two", "three"]
+    assert split_alternatives("a reply with --- inside") == ["a reply with --- inside"]
+
+def test_repost_reuses_a_memoized_comment_after_posting(tmp_path):
+    client = make_client(tmp_path, [alternatives(*REPLIES[:2])])
+
+    first = client.generate_comment("chain", {"text": ANNOUNCEMENT})
+    assert first == REPLIES[0]
+    assert "2 clearly different replies" in client.prompts_sent[0]
+    post(client, first)
+
+    hits = MEMO_LOOKUPS.value(result="hit") + MEMO_LOOKUPS.value(result="similar")
+    second = client.generate_comment("fan", {"text": "RT @chain: " + ANNOUNCEMENT})
+
+    assert second == REPLIES[1]
+    assert len(client.prompts_sent) == 1
+    assert MEMO_LOOKUPS.value(result="hit") + MEMO_LOOKUPS.value(result="similar") == hits + 1
+
+def test_memo_is_exhausted_once_every_candidate_was_posted(tmp_path):
+    client = make_client(tmp_path, [alternatives(*REPLIES[:2]), alternatives(*REPLIES[2:])])
+    post(client, client.generate_comment("chain", {"text": ANNOUNCEMENT}))
+    post(client, client.generate_comment("chain", {"text": ANNOUNCEMENT}))
+    exhausted = MEMO_LOOKUPS.value(result="exhausted")
+    assert client.generate_comment("chain", {"text": ANNOUNCEMENT}) == REPLIES[2]
+    assert MEMO_LOOKUPS.value(result="exhausted") == exhausted + 1
+    assert len(client.prompts_sent) == 2
+
+def test_unsplittable_response_is_never_posted(tmp_path):
+    blob = " ".join(REPLIES)
+    client = make_client(tmp_path, [blob, alternatives(*REPLIES[2:])], attempts=1)
+    assert client.generate_comment("chain", {"text": ANNOUNCEMENT}) == REPLIES[2]
+
+    (tmp_path / "fresh").mkdir()
+    client = make_client(tmp_path / "fresh", [blob])
+    comment = client.generate_comment("chain", {"text": ANNOUNCEMENT})
+    assert comment in [template.format(username="chain") for template in FALLBACK_COMMENTS]
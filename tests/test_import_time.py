@@ -0,0 +1,36 @@
+import os
+import sys
+import subprocess
+import importlib.util
+import pytest
+from conftest import ROOT
+from utils import HEAVY_MODULES
+
+# Generous enough for a cold CI runner; the heavy stack alone costs well over a second
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "1.0"))
+
+def import_times(module):
+    """Import a module in a fresh interpreter under -X importtime; return {module: cumulative seconds}"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            times[name.strip()] = int(cumulative) / 1e6
+        except ValueError:
+            continue  # the header line
+    return times
+
+@pytest.mark.parametrize("module", ["twitter_client", "gemini_client", "gmail_reader", "main"])
+def test_import_skips_heavy_modules(module):
+    if module == "main" and importlib.util.find_spec("schedule") is None:
+        pytest.skip("schedule is not installed")
+    times = import_times(module)
+    assert module in times
+    for heavy in HEAVY_MODULES:
+        assert heavy not in times, f"importing {module} pulled in {heavy}"
+    assert times[module] < IMPORT_BUDGET_SECONDS, f"import {module} took {times[module]:.3f}s"
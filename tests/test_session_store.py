@@ -0,0 +1,34 @@
+import json
+import pytest
+from session_store import SessionStore
+
+STATE = {"cookies": [{"name": "auth_token", "value": "a", "domain": ".x.com", "expires": -1}], "origins": []}
+
+def test_unreadable_store_is_not_overwritten(tmp_path, monkeypatch):
+    monkeypatch.delenv("SESSION_ENCRYPTION_KEY", raising=False)
+    path = tmp_path / "sessions.json"
+    path.write_bytes(b"gAAAAAB-encrypted-by-another-key")
+    store = SessionStore(str(path))
+    assert store.load("main") is None
+    assert store.save("main", STATE) is False
+    assert path.read_bytes() == b"gAAAAAB-encrypted-by-another-key"
+
+def test_wrong_key_is_not_overwritten(tmp_path):
+    fernet = pytest.importorskip("cryptography.fernet")
+    path = tmp_path / "sessions.json"
+    SessionStore(str(path), key=fernet.Fernet.generate_key()).save("other", STATE)
+    before = path.read_bytes()
+    store = SessionStore(str(path), key=fernet.Fernet.generate_key())
+    assert store.save("main", STATE) is False
+    assert path.read_bytes() == before
+
+def test_reload_sees_other_writers(tmp_path, monkeypatch):
+    monkeypatch.delenv("SESSION_ENCRYPTION_KEY", raising=False)
+    path = tmp_path / "sessions.json"
+    reader = SessionStore(str(path))
+    assert reader.load("main") is None
+    assert SessionStore(str(path)).save("main", STATE)
+    assert reader.load("main") is None
+    reader.reload()
+    assert reader.load("main")["cookies"][0]["name"] == "auth_token"
+    assert json.loads(path.read_bytes())["profiles"]["main"]
@@ -0,0 +1,34 @@
+import os
+import json
+import pytest
+from targets import TargetCatalog
+
+PROJECTS = [{"name": "Alpha", "twitter": "@alpha", "category": "DeFi", "website": "https://alpha.xyz"}]
+
+def write(path, data, mtime):
+    path.write_text(json.dumps(data))
+    os.utime(path, (mtime, mtime))
+
+@pytest.mark.parametrize("data", [
+    [PROJECTS],
+    {"projects": [{"name": "Beta", "twitter": "@beta"}], "accounts": []},
+    {"projects": PROJECTS, "accounts": [{"weight": 2}]},
+    {"projects": PROJECTS, "accounts": [{"handle": "a", "weight": "heavy"}]},
+    {"projects": ["Beta"], "accounts": []},
+])
+def test_malformed_reload_keeps_previous_lists(tmp_path, data):
+    path = tmp_path / "targets.json"
+    write(path, {"projects": PROJECTS, "accounts": ["someone"]}, 1000)
+    catalog = TargetCatalog(str(path), str(tmp_path / "state.db"))
+    write(path, data, 2000)
+    assert catalog.reload_if_changed() is False
+    assert catalog.projects == PROJECTS
+    assert catalog.account_handles == ["someone"]
+    assert catalog.project("alpha") == PROJECTS[0]
+
+def test_malformed_first_load_leaves_an_empty_catalog(tmp_path):
+    path = tmp_path / "targets.json"
+    write(path, {"projects": [{"name": "Beta"}]}, 1000)
+    catalog = TargetCatalog(str(path), str(tmp_path / "state.db"))
+    assert catalog.projects == []
+    assert catalog.project("beta") is None
@@ -0,0 +1,96 @@
+import time
+from twitter_client import TwitterClient
+from tweet_extraction import EXTRACT_TWEETS_JS
+
+ACCOUNTS = [f"account{i}" for i in range(12)]
+PER_AUTHOR = 3
+# Simulated cost of one page navigation and of the settle wait after each scroll
+NAVIGATION_SECONDS = 2.0
+
+def record(author, n, retweet=False):
+    tweet_id = str(1000 * (ACCOUNTS.index(author) + 1) + n)
+    return {"id": tweet_id, "author": author, "href": f"/{author}/status/{tweet_id}", "text": f"{author} update {n}",
+            "timestamp": "2026-10-19T08:00:00.000Z", "pinned": False, "retweet": retweet,
+            "replies": 0, "reposts": 0, "likes": 0}
+
+class MockPage:
+    """Stands in for a Playwright page; evaluate returns fixed records one screen at a time"""
+
+    def __init__(self, timelines, screen=6):
+        self.timelines = timelines
+        self.screen = screen
+        self.navigations = 0
+        self.evaluates = 0
+        self.waited = 0.0
+        self.url = None
+        self.scrolls = 0
+
+    def goto(self, url, wait_until=None):
+        self.navigations += 1
+        self.url = url
+        self.scrolls = 0
+
+    def wait_for_selector(self, selector, timeout=None):
+        pass
+
+    def wait_for_timeout(self, ms):
+        self.waited += ms / 1000
+
+    def evaluate(self, expression, arg=None):
+        self.evaluates += 1
+        if expression != EXTRACT_TWEETS_JS:
+            self.scrolls += 1
+            return None
+        # The rendered window slides down the timeline as it scrolls
+        records = self.timelines.get(self.url, [])
+        start = self.scrolls * self.screen
+        return records[start:start + self.screen * 2]
+
+    def simulated_seconds(self):
+        return self.navigations * NAVIGATION_SECONDS + self.waited
+
+def make_client(page):
+    client = TwitterClient.__new__(TwitterClient)
+    client.page = page
+    client.is_logged_in = True
+    client._check_memory = lambda: None
+    return client
+
+def timelines():
+    profiles = {f"https://twitter.com/{author}": [record(author, n) for n in range(PER_AUTHOR + 2)]
+                for author in ACCOUNTS}
+    # The list timeline interleaves every account, with reposts and other authors mixed in
+    home = []
+    for n in range(PER_AUTHOR + 2):
+        for i, author in enumerate(ACCOUNTS):
+            home.append(record(author, n, retweet=n == 1 and i == 0))
+            if n == 0:
+                home.append(dict(record(author, 99), author="someone_else", href=f"/someone_else/status/9{i}"))
+    return profiles, {"https://x.com/i/lists/1": home}
+
+def test_sweep_beats_profile_visits():
+    profiles, lists = timelines()
+
+    page = MockPage(profiles)
+    client = make_client(page)
+    start = time.perf_counter()
+    per_profile = [tweet for author in ACCOUNTS for tweet in client.harvest_timeline(author, limit=PER_AUTHOR)]
+    per_profile_cpu = time.perf_counter() - start
+    per_profile_cost = page.simulated_seconds()
+
+    page = MockPage(lists)
+    client = make_client(page)
+    start = time.perf_counter()
+    swept = list(client.sweep_timeline("https://x.com/i/lists/1", ACCOUNTS, per_author=PER_AUTHOR))
+    sweep_cpu = time.perf_counter() - start
+    sweep_cost = page.simulated_seconds()
+
+    print(f"\nper-profile: {len(per_profile)} tweets, {per_profile_cost:.1f}s simulated, {per_profile_cpu * 1000:.1f}ms cpu")
+    print(f"sweep:       {len(swept)} tweets, {sweep_cost:.1f}s simulated, {sweep_cpu * 1000:.1f}ms cpu")
+
+    assert page.navigations == 1
+    assert {tweet["username"] for tweet in swept} == set(ACCOUNTS)
+    assert all(not tweet["retweet"] for tweet in swept)
+    assert all(sum(1 for tweet in swept if tweet["username"] == author) <= PER_AUTHOR for author in ACCOUNTS)
+    assert len(swept) == len(per_profile)
+    assert sweep_cost < per_profile_cost / 2
@@ -0,0 +1,82 @@
+import json
+import sqlite3
+import multiprocessing
+from collections import Counter
+from leases import SqliteLeaseStore
+from dedup_index import DuplicateIndex
+from targets import TargetCatalog
+
+# Fork keeps the test module's functions available to the children
+fork = multiprocessing.get_context("fork")
+
+def run_processes(target, count, *args):
+    processes = [fork.Process(target=target, args=(i, *args)) for i in range(count)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+def record(db_path, table, *values):
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (seq INTEGER PRIMARY KEY AUTOINCREMENT, worker INTEGER, value TEXT)")
+    conn.execute(f"INSERT INTO {table} (worker, value) VALUES (?, ?)", values)
+    conn.close()
+
+def read(db_path, table):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(f"SELECT worker, value FROM {table} ORDER BY seq").fetchall()
+    conn.close()
+    return rows
+
+def claim_actions(index, db_path, actions):
+    leases = SqliteLeaseStore(worker_id=f"worker-{index}", db_path=db_path)
+    for action in range(actions):
+        if leases.acquire(f"action:{action}"):
+            record(db_path, "claims", index, str(action))
+
+def test_each_action_is_claimed_by_one_process(tmp_path):
+    db_path = str(tmp_path / "state.db")
+    run_processes(claim_actions, 4, db_path, 200)
+    claims = Counter(action for _, action in read(db_path, "claims"))
+    assert len(claims) == 200
+    assert set(claims.values()) == {1}
+
+def plan(index, db_path, targets_path, plans):
+    leases = SqliteLeaseStore(worker_id=f"worker-{index}", db_path=db_path)
+    catalog = TargetCatalog(targets_path, db_path)
+    done = 0
+    while done < plans:
+        if not leases.acquire("planner"):
+            continue
+        try:
+            # What worker.plan_if_due does before planning
+            catalog.reload_state()
+            record(db_path, "plans", index, json.dumps(catalog.sample_accounts(2)))
+            done += 1
+        finally:
+            leases.release("planner")
+
+def test_planners_in_different_processes_share_fair_rotation(tmp_path):
+    db_path = str(tmp_path / "state.db")
+    targets_path = tmp_path / "targets.json"
+    targets_path.write_text(json.dumps({"projects": [], "accounts": [f"account{i}" for i in range(6)]}))
+    run_processes(plan, 3, db_path, str(targets_path), 6)
+    plans = read(db_path, "plans")
+    assert len({worker for worker, _ in plans}) > 1
+    picks = [account for _, accounts in plans for account in json.loads(accounts)]
+    # Each round of three plans covers every account exactly once, whichever process planned it
+    for start in range(0, len(picks), 6):
+        assert sorted(picks[start:start + 6]) == [f"account{i}" for i in range(6)]
+
+def post(index, db_path, text):
+    DuplicateIndex(db_path).add(text, "comment")
+
+def test_duplicate_index_sees_posts_from_other_processes(tmp_path):
+    db_path = str(tmp_path / "state.db")
+    text = "Sub-minute bridging is a real unlock for liquidity, curious how finality is handled"
+    index = DuplicateIndex(db_path)
+    assert not index.is_duplicate(text)
+    run_processes(post, 1, db_path, text)
+    assert index.is_duplicate(text)
+    assert not index.is_duplicate("Completely unrelated thoughts about validator economics and staking yields")
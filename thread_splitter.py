@@ -0,0 +1,87 @@
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Same limits as TwitterClient._split_into_tweets
+TWEET_LIMIT = 260
+SAFETY_MARGIN = 20
+SINGLE_TWEET_LIMIT = 280
+
+SENTENCE_END = re.compile(r'[.!?](?=\s)')
+
+class ThreadSplitter:
+    """Split streamed text into thread parts, releasing each part as soon as it is final"""
+
+    def __init__(self, limit=TWEET_LIMIT - SAFETY_MARGIN):
+        self.limit = limit
+        self.text = ""
+        self.current = ""  # Complete sentences making up the part being built
+        self.pending = ""  # Text after the last sentence boundary
+        self.ready = []
+        self.emitted = 0
+
+    def feed(self, chunk):
+        """Add a chunk of generated text and return any thread parts that are now final"""
+        self.text += chunk
+        self.pending += chunk
+
+        match = SENTENCE_END.search(self.pending)
+        while match:
+            sentence = self.pending[:match.end()]
+            self.pending = self.pending[match.end():]
+            self._add_sentence(sentence)
+            match = SENTENCE_END.search(self.pending)
+
+        # The unfinished sentence can no longer fit alongside the current part
+        if self.current.strip() and len((self.current + self.pending).strip()) > self.limit:
+            self._flush_current()
+        self.pending = self._cut_oversized(self.pending)
+        return self._release()
+
+    def finish(self):
+        """Return the remaining parts once generation is complete"""
+        full_text = self.text.strip()
+        if self.emitted == 0 and len(full_text) <= SINGLE_TWEET_LIMIT:
+            self.ready = []
+            return [full_text] if full_text else []
+
+        self.current += self.pending
+        self.pending = ""
+        self.current = self._cut_oversized(self.current)
+        self._flush_current()
+        parts, self.ready = self.ready, []
+        self.emitted += len(parts)
+        return parts
+
+    def _add_sentence(self, sentence):
+        if self.current.strip() and len((self.current + sentence).strip()) > self.limit:
+            self._flush_current()
+        self.current = self._cut_oversized(self.current + sentence)
+
+    def _flush_current(self):
+        part = self.current.strip()
+        if part:
+            self.ready.append(part)
+        self.current = ""
+
+    def _cut_oversized(self, text):
+        """Move word-bounded pieces of text longer than the limit to ready, return the rest"""
+        while len(text.strip()) > self.limit:
+            text = text.strip()
+            split_index = text.rfind(" ", 0, self.limit)
+            if split_index <= 0:
+                split_index = self.limit
+            self.ready.append(text[:split_index].strip())
+            text = text[split_index:]
+        return text
+
+    def _release(self):
+        # Until the text is known to be longer than one tweet, hold everything back
+        if len(self.text.strip()) <= SINGLE_TWEET_LIMIT or not self.ready:
+            return []
+        parts, self.ready = self.ready, []
+        self.emitted += len(parts)
+        for part in parts:
+            logger.info(f"Thread part ready: {part[:30]}... ({len(part)} chars)")
+        return parts
@@ -0,0 +1,86 @@
+import logging
+from dataclasses import dataclass, asdict
+
+logger = logging.getLogger(__name__)
+
+TWEET_SELECTOR = 'article[data-testid="tweet"]'
+
+# Pull every field we need from up to `limit` articles in a single round trip
+EXTRACT_TWEETS_JS = r'''(limit) => {
+    const count = (article, testId) => {
+        const button = article.querySelector(`[data-testid="${testId}"]`);
+        const label = button ? (button.getAttribute('aria-label') || '') : '';
+        const match = label.match(/^[\d,]+/);
+        return match ? parseInt(match[0].replace(/,/g, ''), 10) : 0;
+    };
+    let articles = Array.from(document.querySelectorAll('article[data-testid="tweet"]'));
+    if (limit) {
+        articles = articles.slice(0, limit);
+    }
+    return articles.map(article => {
+        const timeElement = article.querySelector('time');
+        const link = (timeElement && timeElement.closest('a[href*="/status/"]')) ||
+            article.querySelector('a[href*="/status/"]');
+        const href = link ? link.getAttribute('href') : '';
+        // href looks like /<author>/status/<id>[/...]
+        const parts = href.split('/');
+        const isStatus = parts[2] === 'status';
+        const social = article.querySelector('[data-testid="socialContext"]');
+        const socialText = social ? social.textContent.toLowerCase() : '';
+        const textElement = article.querySelector('[data-testid="tweetText"]');
+        return {
+            id: isStatus ? parts[3] : null,
+            author: isStatus ? parts[1] : null,
+            href: href,
+            text: textElement ? textElement.innerText : '',
+            timestamp: timeElement ? timeElement.getAttribute('datetime') : null,
+            pinned: socialText.includes('pinned'),
+            retweet: socialText.includes('repost') || socialText.includes('retweet'),
+            replies: count(article, 'reply'),
+            reposts: count(article, 'retweet') || count(article, 'unretweet'),
+            likes: count(article, 'like') || count(article, 'unlike')
+        };
+    });
+}'''
+
+@dataclass
+class Tweet:
+    """One tweet as rendered on a timeline"""
+    id: str
+    author: str
+    url: str
+    text: str
+    timestamp: str
+    pinned: bool
+    retweet: bool
+    replies: int
+    reposts: int
+    likes: int
+
+    def as_record(self, username):
+        """Return the dict shape used by the work queue and Gemini prompts"""
+        record = asdict(self)
+        record["username"] = username
+        # A status link to someone else's tweet on this profile is a repost
+        record["retweet"] = self.retweet or (self.author or "").lower() != username.lower()
+        return record
+
+def extract_tweets(page, limit=None):
+    """Extract typed records for the first limit (or all) rendered tweets with one evaluate"""
+    tweets = []
+    for item in page.evaluate(EXTRACT_TWEETS_JS, limit):
+        if not item["id"]:
+            continue
+        tweets.append(Tweet(
+            id=item["id"],
+            author=item["author"],
+            url=f"https://twitter.com{item['href']}",
+            text=item["text"],
+            timestamp=item["timestamp"],
+            pinned=item["pinned"],
+            retweet=item["retweet"],
+            replies=item["replies"],
+            reposts=item["reposts"],
+            likes=item["likes"],
+        ))
+    return tweets
@@ -3,352 +3,193 @@ import time
 import random
 import logging
 import re
-from pathlib import Path  # Added Path import
-from playwright.sync_api import sync_playwright
-from gmail_reader import GmailReader
-from dotenv import load_dotenv
+from urllib.parse import urlencode
+from memory_governor import MemoryGovernor
+from session_store import SessionStore
+from login_flow import LoginFlow
+from tweet_extraction import TWEET_SELECTOR, extract_tweets
+from post_confirmation import PostConfirmation, PostResult, status_url
+from browser_server import SharedBrowser, BROWSER_ARGS
+import metrics
+from config import load_config
 from utils import get_random_user_agent, random_delay  # Added missing imports from utils
 
 logger = logging.getLogger(__name__)
 
+LOGIN_DURATION = metrics.histogram("twitter_login_duration_seconds", "Time spent in the login flow")
+LOGIN_RESULTS = metrics.counter("twitter_logins_total", "Login attempts by result")
+HARVESTED_TWEETS = metrics.counter("twitter_harvested_tweets_total", "Tweets collected from profile timelines")
+COMPOSE_PATHS = metrics.counter("twitter_compose_path_total", "Posts by compose path (intent or ui)")
+
+INTENT_URL = "https://x.com/intent/post"
+POST_BUTTON = '[data-testid="tweetButton"]'
+
 class TwitterClient:
     def __init__(self):
+        load_config()
         self.playwright = None
         self.browser = None
         self.context = None
         self.page = None
-        self.session_file = "twitter_session.json"
+        self.session_store = SessionStore()
+        self.profile = os.getenv("TWITTER_PROFILE") or os.getenv("TWITTER_USERNAME") or "default"
         self.is_logged_in = False
+        self.user_agent = None
+        self.memory_governor = None
+        self.shared_browser = None
+        self.use_intent = os.getenv("COMPOSE_INTENT", "true").lower() == "true"
         
     def _setup_browser(self):
         """Initialize the browser with appropriate settings"""
         logger.info("Setting up browser")
+        from playwright.sync_api import sync_playwright
         self.playwright = sync_playwright().start()
         
-        browser_args = ["--no-sandbox", "--disable-setuid-sandbox", "--disable-dev-shm-usage"]
+        browser_args = BROWSER_ARGS
         logger.info(f"Browser arguments: {browser_args}")
         
-        # Check if storage state exists and is valid
-        storage_path = Path(self.session_file)
-        storage_state = None
-        
-        if storage_path.exists():
-            try:
-                # Check if file contains valid JSON
-                import json
-                with open(storage_path, 'r') as f:
-                    json.load(f)
-                storage_state = str(storage_path)
-                logger.info(f"Using existing session file: {storage_path}")
-            except json.JSONDecodeError:
-                logger.warning("Invalid session file, will create new session")
-                storage_state = None
+        # Storage state is parsed once by the store and handed to Playwright as a dict
+        storage_state = self.session_store.load(self.profile)
+        if os.getenv("BROWSER_ENDPOINT"):
+            # Share one Chromium between workers instead of launching our own
+            self.shared_browser = SharedBrowser(self.playwright)
+            self.browser = self.shared_browser.connect()
         else:
-            logger.info("No session file found, will create new session")
-          # Launch browser with custom user agent
-        self.browser = self.playwright.chromium.launch(
-            headless=True,  # Headless mode for production
-            args=browser_args
-        )
-        logger.info("Browser launched successfully in visible mode")
+            # Launch browser with custom user agent
+            self.browser = self.playwright.chromium.launch(
+                headless=True,  # Headless mode for production
+                args=browser_args
+            )
+            logger.info("Browser launched successfully in visible mode")
         
         # Create context with storage state if available
-        self.context = self.browser.new_context(
-            user_agent=get_random_user_agent(),
+        self.user_agent = get_random_user_agent()
+        self.context = self._new_context(storage_state)
+        
+        # Create page
+        self.page = self._new_page()
+        self.memory_governor = MemoryGovernor(self)
+        metrics.set_status("browser_alive", True)
+        
+    def _new_context(self, storage_state=None):
+        """Create a browser context, optionally restoring cookies and storage"""
+        if self.shared_browser:
+            context = self.shared_browser.new_context(user_agent=self.user_agent, storage_state=storage_state)
+            self.browser = self.shared_browser.browser
+            logger.info("Browser context created in shared browser")
+            return context
+        context = self.browser.new_context(
+            user_agent=self.user_agent,
             storage_state=storage_state
         )
         logger.info("Browser context created")
+        return context
         
-        # Create page
-        self.page = self.context.new_page()
+    def _new_page(self):
+        """Create a page in the current context with the default timeout"""
+        page = self.context.new_page()
         logger.info("Browser page created")
         
         # Set default timeout
-        self.page.set_default_timeout(60000)
+        page.set_default_timeout(60000)
         logger.info("Default timeout set to 60 seconds")
+        return page
         
-    def login(self):
-        """Login to Twitter with automatic verification code handling"""
-        if self.playwright is None:
-            self._setup_browser()
-            
+    def save_session(self):
+        """Persist the current context's storage state to the session store"""
+        self.session_store.save(self.profile, self.context.storage_state())
+        
+    def _reconnect_if_needed(self):
+        """Reopen our context after the shared browser restarted or dropped the connection"""
+        if not self.shared_browser or self.shared_browser.connected():
+            return
+        logger.warning("Lost connection to the shared browser, reconnecting")
+        self.shared_browser.connect()
+        self.context = self._new_context(self.session_store.load(self.profile))
+        self.page = self._new_page()
+        if self.memory_governor:
+            self.memory_governor.cdp_session = None
+        
+    def _check_memory(self):
+        """Reconnect to a shared browser if needed, then let the memory governor recycle the page or context"""
         try:
-            logger.info("===== STARTING TWITTER LOGIN PROCESS =====")
-            
-            # Go to Twitter login directly
-            logger.info("Navigating to Twitter login page")
-            self.page.goto("https://twitter.com/i/flow/login", wait_until="networkidle")
-            random_delay(3, 5)
-            
-            # Take screenshot
-            self.page.screenshot(path="1_login_page.png")
-            logger.info("Saved login page screenshot")
-              # STEP 1: USERNAME ENTRY
-            logger.info("STEP 1: Entering username")
-            # Make sure the username field is visible
+            self._reconnect_if_needed()
+        except Exception as e:
+            logger.error(f"Reconnecting to the shared browser failed: {str(e)}")
+        if self.memory_governor:
             try:
-                self.page.wait_for_selector('input[name="text"]', state="visible", timeout=10000)
-                self.page.fill('input[name="text"]', os.getenv("TWITTER_USERNAME"))
-                logger.info(f"Entered username: {os.getenv('TWITTER_USERNAME')}")
-                random_delay(2, 3)
-                
-                # Click next button
-                logger.info("Clicking next after username")
-                next_result = self.page.evaluate('''() => {
-                    const nextButtons = Array.from(document.querySelectorAll('[role="button"]'));
-                    const nextButton = nextButtons.find(btn => 
-                        btn.textContent.includes("Next") || 
-                        btn.textContent.includes("İleri"));
-                    if (nextButton) {
-                        nextButton.click();
-                        return "clicked";
-                    }
-                    return "not found";
-                }''')
-                logger.info(f"Next button click result: {next_result}")
-                
-                # Wait longer after clicking Next
-                random_delay(5, 8)
-                
+                self.memory_governor.check()
             except Exception as e:
-                logger.error(f"Error entering username: {str(e)}")
-                return False
-                
-            # STEP 2: PASSWORD ENTRY
-            logger.info("STEP 2: Entering password")
+                logger.error(f"Memory check failed: {str(e)}")
+        
+    def login(self, force=False):
+        """Login to Twitter with automatic verification code handling
+
+        Reuses the stored session when it is still valid unless force is set,
+        in which case the full flow runs in a fresh context that replaces the
+        current one only if the login succeeds.
+        """
+        if self.playwright is None:
+            self._setup_browser()
+        
+        if not force and self._stored_session_valid():
+            logger.info("Stored session is valid, skipping login flow")
+            self.is_logged_in = True
+            LOGIN_RESULTS.inc(result="reused")
+            metrics.set_status("session_valid", True)
+            return True
+        with LOGIN_DURATION.time():
+            success = self._fresh_login() if force else self._login_flow()
+        LOGIN_RESULTS.inc(result="success" if success else "failure")
+        metrics.set_status("session_valid", bool(success))
+        return success
+    
+    def _stored_session_valid(self):
+        """Check whether the cookies loaded from the session store are still logged in"""
+        if not self.context.cookies("https://x.com") and not self.context.cookies("https://twitter.com"):
+            return False
+        try:
+            self.page.goto("https://x.com/home", wait_until="domcontentloaded")
+            self.page.wait_for_selector('[data-testid="AppTabBar_Home_Link"]', timeout=15000)
+            return "login" not in self.page.url.lower()
+        except Exception as e:
+            logger.info(f"Stored session is not usable: {str(e)}")
+            return False
+    
+    def _fresh_login(self):
+        """Log in from a cookie-less context, keeping the current one until the new login succeeds"""
+        old_context, old_page = self.context, self.page
+        self.context = self._new_context()
+        self.page = self._new_page()
+        if self.memory_governor:
+            self.memory_governor.cdp_session = None
+        success = False
+        try:
+            success = self._login_flow()
+        finally:
+            stale = old_context if success else self.context
+            if not success:
+                self.context, self.page = old_context, old_page
+                if self.memory_governor:
+                    self.memory_governor.cdp_session = None
             try:
-                # Check if we're on password page with increased timeout and better error handling
-                logger.info("Waiting for password field to appear...")
-                password_found = False
-                password_selector = 'input[name="password"]'
-                
-                try:
-                    # Try the default password selector first
-                    password_element = self.page.wait_for_selector(password_selector, state="visible", timeout=30000)  # Increased timeout
-                    if password_element:
-                        logger.info("Password field found with standard selector")
-                        self.page.fill(password_selector, os.getenv("TWITTER_PASSWORD"))
-                        logger.info("Password entered")
-                        password_found = True
-                        
-                    # Take screenshot to debug what's visible
-                    self.page.screenshot(path="password_field_found.png")
-                    
-                except Exception as pwd_err:
-                    logger.error(f"Error finding standard password field: {str(pwd_err)}")
-                    
-                    # Take screenshot to see what's on screen when it fails
-                    self.page.screenshot(path="password_field_error.png")
-                      # Try alternative selectors that might work
-                    logger.info("Trying alternative password selectors...")
-                    alt_selectors = [
-                        "[data-testid='password']",
-                        "input[type='password']",
-                        ".r-30o5oe.r-1niwhzg",  # Twitter's class-based selectors
-                        "input[autocomplete='current-password']"
-                    ]
-                    
-                    for selector in alt_selectors:
-                        try:
-                            logger.info(f"Trying selector: {selector}")
-                            # First check if the selector exists
-                            element = self.page.query_selector(selector)
-                            if element:
-                                logger.info(f"Found password field with alternative selector: {selector}")
-                                try:
-                                    # Method 1: Try using the selector string directly
-                                    self.page.fill(selector, os.getenv("TWITTER_PASSWORD"))
-                                    logger.info(f"Password entered using selector string")
-                                    password_found = True
-                                    break
-                                except Exception as fill_err:
-                                    logger.error(f"Error using fill with selector: {str(fill_err)}")
-                                    try:
-                                        # Method 2: Try using type() on the element
-                                        element.type(os.getenv("TWITTER_PASSWORD"))
-                                        logger.info(f"Password entered using element.type()")
-                                        password_found = True
-                                        break
-                                    except Exception as type_err:
-                                        logger.error(f"Error using type() method: {str(type_err)}")
-                                        try:
-                                            # Method 3: Try JavaScript evaluation
-                                            js_result = self.page.evaluate(f'''(selector) => {{
-                                                const element = document.querySelector(selector);
-                                                if (element) {{
-                                                    element.value = "{os.getenv("TWITTER_PASSWORD")}";
-                                                    return "success";
-                                                }}
-                                                return "not found";
-                                            }}''', selector)
-                                            logger.info(f"Password entered using JavaScript: {js_result}")
-                                            password_found = True
-                                            break
-                                        except Exception as js_err:
-                                            logger.error(f"Error using JavaScript: {str(js_err)}")
-                                            continue
-                        except Exception as alt_err:
-                            logger.error(f"Error with alternative selector {selector}: {str(alt_err)}")
-                            continue
-                
-                if password_found:
-                    logger.info("Password entry successful")
-                    random_delay(2, 3)
-                    
-                    # Click Log in button
-                    logger.info("Clicking login button")
-                    login_result = self.page.evaluate('''() => {
-                        const loginButtons = Array.from(document.querySelectorAll('[role="button"]'));
-                        const loginButton = loginButtons.find(btn => 
-                            btn.textContent.includes("Log in") || 
-                            btn.textContent.includes("Login") ||
-                            btn.textContent.includes("Giriş"));
-                        if (loginButton) {
-                            loginButton.click();
-                            return "clicked";
-                        }
-                        return "not found";
-                    }''')
-                    logger.info(f"Login button click result: {login_result}")
-                    
-                    # Wait longer after clicking login
-                    random_delay(8, 12)
-                else:
-                    logger.error("Password field not found!")
-                    return False
-                    
+                stale.close()
             except Exception as e:
-                logger.error(f"Error entering password: {str(e)}")
-                return False
-            
-            # STEP 3: CHECK IF VERIFICATION IS NEEDED
-            logger.info("STEP 3: Checking if verification is needed")
-            self.page.screenshot(path="3_after_login.png")
-            
-            # Check the current URL and page content
-            current_url = self.page.url
-            page_content = self.page.content().lower()
-            logger.info(f"Current URL after login: {current_url}")
-            
-            # Indicators that verification is needed
-            verification_needed = False
-            
-            # Check if we're still in the login flow and need verification
-            if ("login" in current_url.lower() or "i/flow" in current_url.lower()) and not "home" in current_url.lower():
-                if ("verification" in page_content or 
-                    "confirm" in page_content or 
-                    "code" in page_content or 
-                    "verify" in page_content):
-                    verification_needed = True
-                    logger.info("Verification appears to be needed")
-            
-            if verification_needed:
-                logger.info("STEP 4: Getting verification code from Gmail")
-                
-                # Get verification code from Gmail
-                gmail_reader = GmailReader()
-                verification_code = gmail_reader.get_twitter_verification_code()
-                
-                if verification_code:
-                    logger.info(f"Retrieved verification code: {verification_code}")
-                    
-                    # Look for verification code input field
-                    code_selectors = [
-                        'input[name="text"]', 
-                        'input[data-testid="ocfEnterTextTextInput"]',
-                        'input[placeholder*="code"]',
-                        'input[type="text"]'
-                    ]
-                    
-                    input_found = False
-                    for selector in code_selectors:
-                        try:
-                            if self.page.query_selector(selector):
-                                logger.info(f"Found verification code input with selector: {selector}")
-                                self.page.fill(selector, verification_code)
-                                random_delay(2, 3)
-                                self.page.screenshot(path="4_verification_code_entered.png")
-                                input_found = True
-                                break
-                        except:
-                            continue
-                    
-                    if not input_found:
-                        logger.error("Could not find verification code input field!")
-                        return False
-                    
-                    # Click next/verify button
-                    logger.info("Clicking next/verify button")
-                    verify_result = self.page.evaluate('''() => {
-                        const buttons = Array.from(document.querySelectorAll('[role="button"]'));
-                        const verifyButton = buttons.find(btn => 
-                            btn.textContent.includes("Next") || 
-                            btn.textContent.includes("Verify") || 
-                            btn.textContent.includes("İleri") ||
-                            btn.textContent.includes("Doğrula"));
-                        if (verifyButton) {
-                            verifyButton.click();
-                            return "clicked";
-                        }
-                        return "not found";
-                    }''')
-                    logger.info(f"Verify button click result: {verify_result}")
-                    
-                    # Wait longer after verification
-                    random_delay(5, 8)
-                else:
-                    logger.error("Failed to get verification code from Gmail!")
-                    return False
-            
-            # STEP 5: CHECK LOGIN SUCCESS
-            logger.info("Checking if login was successful")
-            
-            # Wait a moment for possible redirects
-            random_delay(5, 8)
-            
-            # Take final screenshot
-            self.page.screenshot(path="5_final_state.png")
-            
-            # Check current URL
-            current_url = self.page.url
-            logger.info(f"Final URL: {current_url}")
-            
-            # Check for success indicators
-            if "home" in current_url.lower():
-                logger.info("SUCCESS: Logged in successfully based on URL")
-                self.is_logged_in = True
-                
-                # Save the session
-                self.context.storage_state(path=self.session_file)
-                logger.info(f"Session saved to {self.session_file}")
-                
-                return True
-            else:
-                # Check for UI elements that indicate successful login
-                success_indicators = [
-                    '[data-testid="AppTabBar_Home_Link"]',
-                    'div[aria-label="Home timeline"]',
-                    'div[data-testid="primaryColumn"]'
-                ]
-                
-                for indicator in success_indicators:
-                    if self.page.query_selector(indicator):
-                        logger.info(f"SUCCESS: Found login success indicator: {indicator}")
-                        self.is_logged_in = True
-                        
-                        # Save the session
-                        self.context.storage_state(path=self.session_file)
-                        logger.info(f"Session saved to {self.session_file}")
-                        
-                        return True
-                
-                logger.error("Login failed - could not verify success")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Login process failed with exception: {str(e)}")
-            self.page.screenshot(path="login_error.png")
+                logger.debug(f"Error closing replaced context: {str(e)}")
+        return success
+    
+    def _login_flow(self):
+        """Run the interactive login steps and report whether they succeeded"""
+        logger.info("===== STARTING TWITTER LOGIN PROCESS =====")
+        flow = LoginFlow(self.page)
+        if not flow.run():
+            logger.error(f"Login failed, state timings: {flow.timings}")
             return False
+        
+        logger.info(f"SUCCESS: Logged in, state timings: {flow.timings}")
+        self.is_logged_in = True
+        self.save_session()
+        return True
     
     def _split_into_tweets(self, content):
         """Split content into tweets while preserving sentence integrity"""
@@ -428,8 +269,12 @@ class TwitterClient:
             
         return tweets
 
-    def post_tweet(self, content):
-        """Post a tweet or thread depending on content length"""
+    def post_tweet(self, content, progress=None):
+        """Post a tweet or thread depending on content length
+
+        With a ThreadProgress the post is made reply by reply and resumes
+        after the parts it has already acknowledged.
+        """
         if not self.is_logged_in:
             if not self.login():
                 logger.error("Login failed, cannot post tweet")
@@ -440,12 +285,49 @@ class TwitterClient:
             logger.info(f"Content exceeds Twitter character limit ({len(content)} chars), creating thread")
             tweet_parts = self._split_into_tweets(content)
             logger.info(f"Split content into {len(tweet_parts)} tweets")
-            return self.post_tweet_thread(tweet_parts)
+            return self.post_tweet_thread(tweet_parts, progress)
+        elif progress is not None:
+            return self._post_thread_chained([content], progress)
         else:
             return self._post_single_tweet(content)
 
+    def _post_via_intent(self, content, kind, in_reply_to=None):
+        """Open a compose (or reply) dialog prefilled through the intent URL and click post
+
+        Returns the PostResult, or None if the dialog never became ready so the
+        caller can fall back to the full UI flow. Once post has been clicked the
+        result is final; retrying through the UI could post twice.
+        """
+        params = {"text": content}
+        if in_reply_to:
+            params["in_reply_to"] = in_reply_to
+        try:
+            self.page.goto(f"{INTENT_URL}?{urlencode(params)}", wait_until="domcontentloaded")
+            post_button = self.page.wait_for_selector(f'{POST_BUTTON}:not([aria-disabled="true"])',
+                                                      state="visible", timeout=10000)
+        except Exception as e:
+            logger.warning(f"Intent compose dialog not ready, falling back to UI flow: {str(e)}")
+            return None
+        
+        confirmation = PostConfirmation(self.page, kind).start()
+        try:
+            post_button.click()
+        except Exception as e:
+            confirmation.stop()
+            logger.warning(f"Could not click post in intent dialog, falling back to UI flow: {str(e)}")
+            return None
+        COMPOSE_PATHS.inc(path="intent")
+        return confirmation.wait()
+
     def _post_single_tweet(self, content):
-        """Post a single tweet"""
+        """Post a single tweet and return the server's PostResult (False if the UI failed)"""
+        self._check_memory()
+        if self.use_intent:
+            result = self._post_via_intent(content, "tweet")
+            if result is not None:
+                return result
+        COMPOSE_PATHS.inc(path="ui")
+        confirmation = PostConfirmation(self.page, "tweet")
         try:
             logger.info("Posting single tweet")
             # Navigate to home if not already there
@@ -567,6 +449,7 @@ class TwitterClient:
             
             # Click tweet/post button
             logger.info("Clicking post button")
+            confirmation.start()
             post_selectors = [
                 'div[data-testid="tweetButtonInline"]',
                 'div[data-testid="tweetButton"]',
@@ -622,34 +505,46 @@ class TwitterClient:
             
             if not post_clicked:
                 logger.error("Could not click post button")
+                confirmation.stop()
                 self.page.screenshot(path="post_button_not_found.png")
                 return False
                 
-            # Wait for tweet to be posted
+            # Wait for the server to acknowledge the tweet
             logger.info("Waiting for tweet to be posted")
-            random_delay(4, 8)
-            
-            # Take screenshot of result
-            self.page.screenshot(path="after_posting_tweet.png")
-            
-            logger.info("Tweet posted successfully")
-            return True
+            result = confirmation.wait()
+            if result:
+                logger.info("Tweet posted successfully")
+            return result
             
         except Exception as e:
+            confirmation.stop()
             logger.error(f"Failed to post tweet: {str(e)}")
             # Take screenshot of error state
             self.page.screenshot(path="tweet_error.png")
             return False
 
-    def post_tweet_thread(self, content_list):
-        """Post a thread of tweets"""
+    def post_tweet_thread(self, content_list, progress=None):
+        """Post a thread of tweets
+
+        content_list may be a list or an iterator such as StreamedTweet.parts(),
+        in which case each part is typed as soon as it is produced. Returns the
+        server's PostResult for the whole thread. With a ThreadProgress the
+        thread is posted reply by reply instead of from one compose dialog.
+        """
         if not self.is_logged_in:
             if not self.login():
                 logger.error("Login failed, cannot post tweet thread")
                 return False
+        
+        if progress is not None:
+            return self._post_thread_chained(content_list, progress)
                 
+        self._check_memory()
+        confirmation = PostConfirmation(self.page, "thread")
         try:
-            logger.info(f"Posting a thread with {len(content_list)} tweets")
+            total = len(content_list) if isinstance(content_list, list) else "?"
+            parts = iter(content_list)
+            logger.info(f"Posting a thread with {total} tweets")
             
             # Navigate to compose tweet page directly
             compose_url = "https://twitter.com/compose/tweet"
@@ -658,8 +553,11 @@ class TwitterClient:
             random_delay(3, 5)
             
             # Enter the first tweet
-            logger.info(f"Entering content for tweet 1/{len(content_list)}")
-            first_tweet_content = content_list[0]
+            logger.info(f"Entering content for tweet 1/{total}")
+            first_tweet_content = next(parts, None)
+            if not first_tweet_content:
+                logger.error("No content to post in thread")
+                return False
             
             # Wait for the textarea to be ready
             self.page.wait_for_selector('[data-testid="tweetTextarea_0"]', state="visible", timeout=10000)
@@ -668,6 +566,7 @@ class TwitterClient:
             # Enter first tweet content
             try:
                 self.page.fill('[data-testid="tweetTextarea_0"]', first_tweet_content)
+                typed = 1
                 logger.info("Entered content for first tweet")
                 random_delay(2, 3)
             except Exception as e:
@@ -675,8 +574,8 @@ class TwitterClient:
                 return False
             
             # Add remaining tweets to thread
-            for i, tweet_content in enumerate(content_list[1:], 2):
-                logger.info(f"Adding tweet {i}/{len(content_list)} to thread")
+            for i, tweet_content in enumerate(parts, 2):
+                logger.info(f"Adding tweet {i}/{total} to thread")
                 
                 try:
                     # First try to find the + Add button
@@ -736,6 +635,7 @@ class TwitterClient:
                     next_textarea_selector = f'[data-testid="tweetTextarea_{i-1}"]'
                     self.page.wait_for_selector(next_textarea_selector, state="visible", timeout=5000)
                     self.page.fill(next_textarea_selector, tweet_content)
+                    typed = i
                     logger.info(f"Entered content for tweet {i}")
                     random_delay(2, 3)
                     
@@ -748,89 +648,168 @@ class TwitterClient:
             logger.info("Posting the complete thread")
             try:
                 post_button = self.page.wait_for_selector('[data-testid="tweetButton"]', state="visible", timeout=5000)
-                if post_button:
-                    post_button.click()
-                    logger.info("Clicked post button")
-                    random_delay(5, 8)
-                    return True
+                confirmation.start()
+                post_button.click()
+                logger.info("Clicked post button")
+                # X creates the head and then each reply, one CreateTweet per part
+                return confirmation.wait(expected=typed)
             except Exception as e:
+                confirmation.stop()
                 logger.error(f"Error posting thread: {str(e)}")
                 return False
                 
         except Exception as e:
             logger.error(f"Thread posting failed: {str(e)}")
             return False
-            
-        return True
 
+    def _post_thread_chained(self, content_list, progress):
+        """Post the head, then each part as a reply to the last acknowledged part
+
+        Every acknowledged part is recorded in progress before the next one is
+        posted, so a failure resumes from the last confirmed part instead of
+        reposting the whole thread.
+        """
+        tweet_ids = list(progress.acked)
+        if tweet_ids:
+            logger.info(f"Resuming thread after {len(tweet_ids)} acknowledged parts")
+        for index, content in enumerate(content_list):
+            if index < len(tweet_ids):
+                if progress.contents[index] != content:
+                    logger.warning(f"Thread part {index + 1} differs from the part already posted")
+                continue
+            logger.info(f"Posting thread part {index + 1}")
+            if index == 0:
+                result = self._post_single_tweet(content)
+            else:
+                result = self.post_comment(status_url(tweet_ids[-1]), content)
+            if not result:
+                logger.error(f"Thread part {index + 1} failed after {len(tweet_ids)} acknowledged parts")
+                return result
+            tweet_ids.append(result.tweet_id)
+            progress.ack(index, content, result.tweet_id)
+        
+        if not tweet_ids:
+            logger.error("No content to post in thread")
+            return False
+        return PostResult(True, tweet_id=tweet_ids[0], url=status_url(tweet_ids[0]), tweet_ids=tweet_ids)
+
+    def _scroll_timeline(self, url, max_scrolls):
+        """Open a timeline and yield each newly rendered Tweet while scrolling"""
+        self._check_memory()
+        self.page.goto(url, wait_until="domcontentloaded")
+        try:
+            self.page.wait_for_selector(TWEET_SELECTOR, timeout=10000)
+        except Exception as e:
+            logger.error(f"No tweets rendered on {url}: {str(e)}")
+            return
+        
+        seen = set()
+        stalled = 0
+        for scroll in range(max_scrolls + 1):
+            new_items = 0
+            for tweet in extract_tweets(self.page):
+                if tweet.id in seen:
+                    continue
+                seen.add(tweet.id)
+                new_items += 1
+                HARVESTED_TWEETS.inc()
+                yield tweet
+            
+            # Give up once scrolling stops loading anything new
+            stalled = 0 if new_items else stalled + 1
+            if stalled >= 2:
+                break
+            self.page.evaluate("() => window.scrollBy(0, window.innerHeight * 2)")
+            self.page.wait_for_timeout(random.randint(800, 1500))
+    
+    def harvest_timeline(self, username, limit=10, known_ids=(), max_scrolls=8):
+        """Yield up to limit recent tweets from one profile visit, scrolling as needed
+
+        Stops early at the first non-pinned tweet whose id is in known_ids, since
+        everything below it has been seen before.
+        """
+        if not self.is_logged_in:
+            if not self.login():
+                raise RuntimeError("Login failed, cannot harvest timeline")
+        
+        profile_url = f"https://twitter.com/{username}"
+        logger.info(f"Harvesting up to {limit} tweets from {profile_url}")
+        count = 0
+        for tweet in self._scroll_timeline(profile_url, max_scrolls):
+            if tweet.id in known_ids and not tweet.pinned:
+                logger.info(f"Reached already seen tweet {tweet.id} for @{username}, stopping")
+                return
+            yield tweet.as_record(username)
+            count += 1
+            if count >= limit:
+                return
+        logger.info(f"Harvested {count} tweets from @{username}")
+    
+    def sweep_timeline(self, timeline_url, usernames, per_author=5, known_ids=(), max_scrolls=20):
+        """Yield tweets by any of usernames from one list or home timeline, grouped by author
+
+        One navigation covers every account that posted recently, instead of one
+        profile visit per account. Stops once every author has per_author tweets
+        or the timeline stops loading.
+        """
+        if not self.is_logged_in:
+            if not self.login():
+                raise RuntimeError("Login failed, cannot sweep timeline")
+        
+        wanted = {username.lower(): username for username in usernames}
+        counts = {}
+        logger.info(f"Sweeping {timeline_url} for {len(wanted)} accounts")
+        for tweet in self._scroll_timeline(timeline_url, max_scrolls):
+            username = wanted.get((tweet.author or "").lower())
+            # Demultiplex by author; reposts and unrelated authors are ignored
+            if username is None or tweet.retweet or tweet.id in known_ids:
+                continue
+            if counts.get(username, 0) >= per_author:
+                continue
+            counts[username] = counts.get(username, 0) + 1
+            yield tweet.as_record(username)
+            if len(counts) == len(wanted) and all(n >= per_author for n in counts.values()):
+                break
+        logger.info(f"Timeline sweep found tweets from {len(counts)}/{len(wanted)} accounts")
+    
     def get_latest_tweet(self, username):
         """Get the latest tweet from a user"""
         if not self.is_logged_in:
             if not self.login():
-                logger.error("Login failed, cannot get latest tweet")
-                return None
+                raise RuntimeError("Login failed, cannot get latest tweet")
         
-        try:
-            # Navigate to user's profile
-            profile_url = f"https://twitter.com/{username}"
-            logger.info(f"Getting latest tweet from {profile_url}")
-            self.page.goto(profile_url, wait_until="domcontentloaded")
-            random_delay(3, 5)
-            
-            # Wait for tweets to load
-            selectors = [
-                'article[data-testid="tweet"]',
-                '[data-testid="tweet"]',
-                'article[role="article"]'
-            ]
-            
-            tweet_found = False
-            tweet_element = None
-            
-            for selector in selectors:
-                try:
-                    tweet_element = self.page.wait_for_selector(selector, timeout=10000)
-                    if tweet_element:
-                        tweet_found = True
-                        logger.info(f"Found tweet with selector: {selector}")
-                        break
-                except Exception as e:
-                    logger.info(f"Selector {selector} failed: {str(e)}")
-            
-            if not tweet_found or not tweet_element:
-                logger.error(f"Could not find latest tweet for @{username}")
-                return None
-            
-            # Get tweet URL
-            tweet_link = tweet_element.query_selector('a[href*="/status/"]')
-            if not tweet_link:
-                logger.error("Could not find tweet URL")
-                return None
-            
-            tweet_url = tweet_link.get_attribute('href')
-            if not tweet_url.startswith('http'):
-                tweet_url = f"https://twitter.com{tweet_url}"
-            
-            # Get tweet text
-            tweet_text = tweet_element.inner_text()
-            
-            return {
-                "url": tweet_url,
-                "text": tweet_text,
-                "username": username
-            }
-            
-        except Exception as e:
-            logger.error(f"Error getting latest tweet from @{username}: {str(e)}")
+        self._check_memory()
+        # Errors propagate so the caller's circuit breaker sees a dead browser
+        profile_url = f"https://twitter.com/{username}"
+        logger.info(f"Getting latest tweet from {profile_url}")
+        self.page.goto(profile_url, wait_until="domcontentloaded")
+        
+        # Wait for tweets to load, then read the first few in one round trip
+        self.page.wait_for_selector(TWEET_SELECTOR, timeout=10000)
+        tweets = extract_tweets(self.page, limit=3)
+        if not tweets:
+            logger.error(f"Could not find latest tweet for @{username}")
             return None
+        
+        # Skip a pinned tweet, which is usually not the latest one
+        latest = next((tweet for tweet in tweets if not tweet.pinned), tweets[0])
+        return latest.as_record(username)
 
     def post_comment(self, tweet_url, comment):
-        """Post a comment on a tweet"""
+        """Post a comment on a tweet and return the server's PostResult (False if the UI failed)"""
         if not self.is_logged_in:
             if not self.login():
                 logger.error("Login failed, cannot post comment")
                 return False
         
+        self._check_memory()
+        if self.use_intent:
+            match = re.search(r"/status/(\d+)", tweet_url)
+            result = self._post_via_intent(comment, "comment", in_reply_to=match.group(1)) if match else None
+            if result is not None:
+                return result
+        COMPOSE_PATHS.inc(path="ui")
+        confirmation = None
         try:
             # Navigate to tweet
             logger.info(f"Navigating to tweet: {tweet_url}")
@@ -886,6 +865,7 @@ class TwitterClient:
             random_delay(2, 3)
             
             # Click reply/post button
+            confirmation = PostConfirmation(self.page, "comment").start()
             post_selectors = [
                 '[data-testid="tweetButton"]',
                 'div[data-testid="tweetButtonInline"]',
@@ -906,21 +886,23 @@ class TwitterClient:
             
             if not posted:
                 logger.error("Could not click post button")
+                confirmation.stop()
                 return False
             
-            random_delay(3, 5)
-            return True
+            return confirmation.wait()
             
         except Exception as e:
+            if confirmation:
+                confirmation.stop()
             logger.error(f"Error posting comment: {str(e)}")
             return False
 
     def close(self):
         """Close browser and playwright"""
         try:
-            if self.context:
-                # Save the session state before closing
-                self.context.storage_state(path=self.session_file)
+            if self.context and self.is_logged_in:
+                # Save the session state before closing; a failed login must not overwrite a stored session
+                self.save_session()
             
             if self.browser:
                 self.browser.close()
@@ -928,6 +910,7 @@ class TwitterClient:
             if self.playwright:
                 self.playwright.stop()
                 
+            metrics.set_status("browser_alive", False)
             logger.info("Browser and Playwright closed")
         except Exception as e:
             logger.error(f"Error closing browser: {str(e)}")
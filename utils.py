@@ -1,6 +1,8 @@
 import time
 import random
 import logging
+import importlib
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -40,4 +42,21 @@ def handle_rate_limiting(e):
         logger.warning(f"Rate limit detected, waiting for {wait_time} seconds")
         time.sleep(wait_time)
         return True
-    return False
\ No newline at end of file
+    return False
+
+# Heavy dependencies that are only needed once a run starts
+HEAVY_MODULES = ("playwright.sync_api", "google.generativeai")
+
+def warm_up_imports(modules=HEAVY_MODULES):
+    """Import heavy modules on a background thread so first use does not pay for them"""
+    def _import_all():
+        for name in modules:
+            start = time.monotonic()
+            try:
+                importlib.import_module(name)
+                logger.info(f"Warmed up {name} in {time.monotonic() - start:.2f} seconds")
+            except ImportError as e:
+                logger.warning(f"Could not warm up {name}: {str(e)}")
+    thread = threading.Thread(target=_import_all, name="import-warm-up", daemon=True)
+    thread.start()
+    return thread
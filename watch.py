@@ -0,0 +1,77 @@
+import os
+import time
+import logging
+from datetime import datetime
+import metrics
+
+logger = logging.getLogger(__name__)
+
+WATCH_POLLS = metrics.counter("watch_polls_total", "Watched account polls by result")
+WATCH_POLL_DURATION = metrics.histogram("watch_poll_duration_seconds", "Time to check one watched account")
+WATCH_DETECTION_LAG = metrics.histogram(
+    "watch_detection_lag_seconds", "Time from a tweet being posted to the watcher noticing it",
+    buckets=(5, 10, 20, 30, 60, 120, 300, 600, 1800))
+
+def _tweet_age(timestamp, now):
+    try:
+        posted = datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+    return max(0.0, now - posted)
+
+class AccountWatcher:
+    """Round-robin poller that spots new tweets from watched accounts
+
+    Each call to poll_next() checks one account with get_latest_tweet (a
+    single navigation and evaluate). The first poll of an account only records
+    its newest tweet id, so the watcher reacts to tweets posted after it
+    started rather than replying to the backlog.
+    """
+
+    def __init__(self, twitter_client, accounts):
+        self.twitter_client = twitter_client
+        self.accounts = accounts
+        self.interval = float(os.getenv("WATCH_INTERVAL_SECONDS", "15"))
+        self.max_age = float(os.getenv("WATCH_MAX_TWEET_AGE_MINUTES", "30")) * 60
+        self.latest = {}
+        self.cursor = 0
+
+    def poll_next(self):
+        """Check the next account; return a new tweet record (with detected_at) or None"""
+        accounts = self.accounts()
+        if not accounts:
+            return None
+        username = accounts[self.cursor % len(accounts)]
+        self.cursor += 1
+
+        with WATCH_POLL_DURATION.time():
+            tweet = self.twitter_client.get_latest_tweet(username)
+        if not tweet or not tweet.get("id"):
+            WATCH_POLLS.inc(result="empty")
+            return None
+
+        tweet_id = int(tweet["id"])
+        previous = self.latest.get(username)
+        self.latest[username] = max(previous or 0, tweet_id)
+        if previous is None:
+            WATCH_POLLS.inc(result="baseline")
+            return None
+        if tweet_id <= previous:
+            WATCH_POLLS.inc(result="unchanged")
+            return None
+        if tweet["retweet"]:
+            WATCH_POLLS.inc(result="repost")
+            return None
+
+        now = time.time()
+        age = _tweet_age(tweet.get("timestamp"), now)
+        if age is not None:
+            WATCH_DETECTION_LAG.observe(age)
+            if age > self.max_age:
+                logger.info(f"New tweet from @{username} is {age / 60:.0f} minutes old, not replying")
+                WATCH_POLLS.inc(result="stale")
+                return None
+        WATCH_POLLS.inc(result="new")
+        logger.info(f"Detected new tweet from @{username}: {tweet['url']}")
+        tweet["detected_at"] = now
+        return tweet
@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+
+class WorkQueue:
+    """Persistent queue of planned bot actions so a crashed run can resume"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.getenv("WORK_QUEUE_DB", "bot_state.db")
+        self.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS actions (
+                action_id TEXT PRIMARY KEY,
+                run_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                target TEXT NOT NULL,
+                payload TEXT,
+                tweet TEXT,
+                content TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                result_url TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_actions_run ON actions (run_id, status, seq);
+            CREATE TABLE IF NOT EXISTS posted_tweets (
+                tweet_url TEXT PRIMARY KEY,
+                action_id TEXT NOT NULL,
+                posted_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS thread_parts (
+                action_id TEXT NOT NULL,
+                part INTEGER NOT NULL,
+                content TEXT NOT NULL,
+                tweet_id TEXT NOT NULL,
+                posted_at REAL NOT NULL,
+                PRIMARY KEY (action_id, part)
+            );
+        """)
+        # Databases created before posts returned their URL lack this column
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(actions)")}
+        if "result_url" not in columns:
+            self.conn.execute("ALTER TABLE actions ADD COLUMN result_url TEXT")
+        logger.info(f"Work queue opened at {self.db_path}")
+
+    def pending_run(self):
+        """Return the id of the newest unfinished run, if any"""
+        row = self.conn.execute(
+            "SELECT run_id FROM runs WHERE finished_at IS NULL ORDER BY created_at DESC LIMIT 1"
+        ).fetchone()
+        return row["run_id"] if row else None
+
+    def last_run_at(self):
+        """Return when the newest run was planned, or None"""
+        row = self.conn.execute("SELECT MAX(created_at) AS created_at FROM runs").fetchone()
+        return row["created_at"]
+
+    def action_status(self, action_id):
+        """Return an action's current status as stored, e.g. after another worker touched it"""
+        row = self.conn.execute("SELECT status FROM actions WHERE action_id = ?", (action_id,)).fetchone()
+        return row["status"] if row else None
+
+    def plan_run(self, projects, accounts):
+        """Persist a new run with one action per project post and account comment"""
+        run_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.execute("INSERT INTO runs (run_id, created_at) VALUES (?, ?)", (run_id, now))
+            seq = 0
+            for project in projects:
+                self._insert_action(run_id, seq, "project_post", project["name"], project, now)
+                seq += 1
+            for username in accounts:
+                self._insert_action(run_id, seq, "comment", username, None, now)
+                seq += 1
+        logger.info(f"Planned run {run_id}: {len(projects)} project posts, {len(accounts)} comments")
+        return run_id
+
+    def _insert_action(self, run_id, seq, kind, target, payload, now):
+        self.conn.execute(
+            "INSERT INTO actions (action_id, run_id, seq, kind, target, payload, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (f"{run_id}:{seq}", run_id, seq, kind, target,
+             json.dumps(payload) if payload is not None else None, now)
+        )
+
+    def pending_actions(self, run_id):
+        """Return the run's unfinished actions in planned order"""
+        rows = self.conn.execute(
+            "SELECT * FROM actions WHERE run_id = ? AND status = 'pending' ORDER BY seq",
+            (run_id,)
+        ).fetchall()
+        return [self._row_to_action(row) for row in rows]
+
+    def _row_to_action(self, row):
+        return {
+            "action_id": row["action_id"],
+            "kind": row["kind"],
+            "target": row["target"],
+            "payload": json.loads(row["payload"]) if row["payload"] else None,
+            "tweet": json.loads(row["tweet"]) if row["tweet"] else None,
+            "content": row["content"],
+            "attempts": row["attempts"],
+        }
+
+    def save_tweet(self, action_id, tweet):
+        """Record the scraped target tweet so it is not fetched again"""
+        self._update(action_id, tweet=json.dumps(tweet))
+
+    def save_content(self, action_id, content):
+        """Record generated text so it is not generated again"""
+        self._update(action_id, content=content)
+
+    def is_posted(self, tweet_url):
+        """Check whether we already replied to this tweet"""
+        row = self.conn.execute(
+            "SELECT 1 FROM posted_tweets WHERE tweet_url = ?", (tweet_url,)
+        ).fetchone()
+        return row is not None
+
+    def commented_tweet_ids(self):
+        """Return the ids of every tweet we already replied to"""
+        rows = self.conn.execute("SELECT tweet_url FROM posted_tweets").fetchall()
+        return {row["tweet_url"].rstrip("/").rsplit("/", 1)[-1] for row in rows}
+
+    def engaged_tweets(self, limit=200):
+        """Return the text of the most recent tweets we commented on"""
+        rows = self.conn.execute(
+            "SELECT tweet FROM actions WHERE kind = 'comment' AND status = 'done' AND tweet IS NOT NULL "
+            "ORDER BY updated_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [json.loads(row["tweet"])["text"] for row in rows]
+
+    def mark_done(self, action_id, tweet_url=None, result_url=None):
+        """Mark an action as completed, remembering the replied-to tweet and the URL we posted"""
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self._update(action_id, status="done", result_url=result_url)
+            if tweet_url:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO posted_tweets (tweet_url, action_id, posted_at) VALUES (?, ?, ?)",
+                    (tweet_url, action_id, time.time())
+                )
+
+    def mark_skipped(self, action_id, reason):
+        """Mark an action as having nothing to do"""
+        self._update(action_id, status="skipped", last_error=reason)
+
+    def mark_failed(self, action_id, error):
+        """Count a failed attempt; give up once MAX_ATTEMPTS is reached"""
+        row = self.conn.execute(
+            "SELECT attempts FROM actions WHERE action_id = ?", (action_id,)
+        ).fetchone()
+        attempts = (row["attempts"] if row else 0) + 1
+        status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+        self._update(action_id, status=status, attempts=attempts, last_error=str(error))
+        if status == "failed":
+            logger.warning(f"Action {action_id} failed {attempts} times, giving up")
+
+    def thread_progress(self, action_id):
+        """Return the acknowledged parts of a thread being posted reply by reply"""
+        return ThreadProgress(self, action_id)
+
+    def run_outcomes(self, run_id):
+        """Return (kind, target, status) for every settled action in a run"""
+        rows = self.conn.execute(
+            "SELECT kind, target, status FROM actions WHERE run_id = ? AND status != 'pending' ORDER BY seq",
+            (run_id,)
+        ).fetchall()
+        return [(row["kind"], row["target"], row["status"]) for row in rows]
+
+    def finish_run(self, run_id):
+        """Close the run once no pending actions remain"""
+        row = self.conn.execute(
+            "SELECT COUNT(*) AS n FROM actions WHERE run_id = ? AND status = 'pending'", (run_id,)
+        ).fetchone()
+        if row["n"]:
+            logger.info(f"Run {run_id} still has {row['n']} pending actions, will resume next time")
+            return False
+        # Only the caller that actually closes the run gets True, even with several workers
+        cursor = self.conn.execute(
+            "UPDATE runs SET finished_at = ? WHERE run_id = ? AND finished_at IS NULL", (time.time(), run_id)
+        )
+        if cursor.rowcount != 1:
+            return False
+        logger.info(f"Run {run_id} finished")
+        return True
+
+    def _update(self, action_id, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        self.conn.execute(
+            f"UPDATE actions SET {assignments} WHERE action_id = ?",
+            (*fields.values(), action_id)
+        )
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+class ThreadProgress:
+    """Per-part acknowledgements of one thread, so a retry resumes after the last posted part"""
+
+    def __init__(self, queue, action_id):
+        self.queue = queue
+        self.action_id = action_id
+        rows = queue.conn.execute(
+            "SELECT content, tweet_id FROM thread_parts WHERE action_id = ? ORDER BY part", (action_id,)
+        ).fetchall()
+        self.contents = [row["content"] for row in rows]
+        self.acked = [row["tweet_id"] for row in rows]
+
+    def ack(self, part, content, tweet_id):
+        """Record that a part was posted and acknowledged by the server"""
+        self.queue.conn.execute(
+            "INSERT OR REPLACE INTO thread_parts (action_id, part, content, tweet_id, posted_at) VALUES (?, ?, ?, ?, ?)",
+            (self.action_id, part, content, tweet_id, time.time())
+        )
+        self.contents.append(content)
+        self.acked.append(tweet_id)
@@ -0,0 +1,160 @@
+import os
+import time
+import logging
+import argparse
+import multiprocessing
+from twitter_client import TwitterClient
+import gemini_client as gemini
+from work_queue import WorkQueue
+from dedup_index import DuplicateIndex
+from comment_memo import CommentMemo
+from bot_run import get_catalog, plan_run, process_actions, record_outcomes, COMMENT_TOP_K
+from leases import open_lease_store, Heartbeat
+
+logger = logging.getLogger(__name__)
+
+WORKER_BATCH = int(os.getenv("WORKER_BATCH", "4"))
+WORKER_IDLE_SECONDS = float(os.getenv("WORKER_IDLE_SECONDS", "30"))
+PLAN_INTERVAL = float(os.getenv("WORKER_PLAN_INTERVAL_HOURS", "2")) * 3600
+LOGIN_WAIT_SECONDS = float(os.getenv("WORKER_LOGIN_WAIT_SECONDS", "600"))
+
+def plan_if_due(queue, leases, catalog):
+    """Plan the next run when none is pending and the interval has passed; one planner at a time"""
+    if not leases.acquire("planner"):
+        return
+    try:
+        if queue.pending_run():
+            return
+        last = queue.last_run_at()
+        if last and time.time() - last < PLAN_INTERVAL:
+            return
+        # The last planner may have been another process; start from its scheduler state
+        catalog.reload_state()
+        plan_run(queue, catalog)
+    finally:
+        leases.release("planner")
+
+def claim_batch(queue, leases, run_id):
+    """Lease up to WORKER_BATCH pending actions; return them with the run's pending comment count"""
+    pending = queue.pending_actions(run_id)
+    claimed = []
+    for action in pending:
+        if len(claimed) >= WORKER_BATCH:
+            break
+        name = f"action:{action['action_id']}"
+        if not leases.acquire(name):
+            continue
+        # Another worker may have finished it between listing and claiming
+        if queue.action_status(action["action_id"]) != "pending":
+            leases.release(name)
+            continue
+        # Never work on the same account from two workers at once
+        if action["kind"] == "comment" and not leases.acquire(f"account:{action['target'].lower()}"):
+            leases.release(name)
+            continue
+        claimed.append(action)
+    comments = sum(1 for action in pending if action["kind"] == "comment")
+    return claimed, comments
+
+def release_batch(leases, actions):
+    for action in actions:
+        leases.release(f"action:{action['action_id']}")
+        if action["kind"] == "comment":
+            leases.release(f"account:{action['target'].lower()}")
+
+def login_once(twitter_client, leases):
+    """Log in holding the session lease so only one worker runs the login flow at a time"""
+    name = f"session:{twitter_client.profile}"
+    deadline = time.monotonic() + LOGIN_WAIT_SECONDS
+    while not leases.acquire(name):
+        if time.monotonic() > deadline:
+            raise RuntimeError("Timed out waiting for another worker to finish logging in")
+        time.sleep(5)
+    try:
+        # Pick up a session another worker may have just saved
+        twitter_client.session_store.reload()
+        if not twitter_client.login():
+            raise RuntimeError("Login failed")
+    finally:
+        leases.release(name)
+
+def run_worker(worker_id=None):
+    """Claim and process actions from the shared work queue until stopped
+
+    Every worker can plan runs (under the planner lease) and claims actions
+    through leases kept alive by a heartbeat thread. When a worker dies, its
+    leases expire after LEASE_TTL_SECONDS and the remaining work is picked up
+    by the others. Workers share the work queue, duplicate index, comment
+    memo and scheduler state through the local SQLite file, so they must all
+    run on one host.
+    """
+    leases = open_lease_store(worker_id)
+    heartbeat = Heartbeat(leases).start()
+    queue = WorkQueue()
+    dedup_index = DuplicateIndex()
+    comment_memo = CommentMemo()
+    twitter_client = None
+    gemini_client = None
+    logger.info(f"Worker {leases.worker_id} started")
+    try:
+        while True:
+            catalog = get_catalog()
+            plan_if_due(queue, leases, catalog)
+            run_id = queue.pending_run()
+            batch, comments = claim_batch(queue, leases, run_id) if run_id else ([], 0)
+            if not batch:
+                time.sleep(WORKER_IDLE_SECONDS)
+                continue
+
+            logger.info(f"Worker {leases.worker_id} claimed {len(batch)} actions from run {run_id}")
+            try:
+                if twitter_client is None:
+                    twitter_client = TwitterClient()
+                    gemini_client = gemini.get_client(dedup_index=dedup_index, comment_memo=comment_memo)
+                    login_once(twitter_client, leases)
+                # Each worker keeps its share of the run's top comments
+                batch_comments = sum(1 for action in batch if action["kind"] == "comment")
+                top_k = max(1, round(COMMENT_TOP_K * batch_comments / comments)) if comments else COMMENT_TOP_K
+                process_actions(queue, batch, twitter_client, gemini_client, dedup_index, catalog, top_k,
+                                still_ours=lambda action: leases.holds(f"action:{action['action_id']}"))
+            except Exception as e:
+                logger.error(f"Worker {leases.worker_id} batch failed: {str(e)}")
+                if twitter_client is not None:
+                    twitter_client.close()
+                    twitter_client = None
+            finally:
+                release_batch(leases, batch)
+
+            if queue.finish_run(run_id):
+                catalog.reload_state()
+                record_outcomes(queue, run_id, catalog)
+            elif all(queue.action_status(action["action_id"]) == "pending" for action in batch):
+                # Nothing moved (e.g. an open circuit deferred the batch), so back off before reclaiming
+                time.sleep(WORKER_IDLE_SECONDS)
+    finally:
+        heartbeat.stop()
+        if twitter_client is not None:
+            twitter_client.close()
+        if gemini_client is not None:
+            gemini_client.close()
+        queue.close()
+        dedup_index.close()
+        comment_memo.close()
+        leases.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Run lease-coordinated bot workers")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("WORKER_PROCESSES", "1")),
+                        help="number of worker processes to start on this host")
+    parser.add_argument("--worker-id", default=os.getenv("WORKER_ID"),
+                        help="worker id (defaults to host:pid); only used with a single process")
+    args = parser.parse_args()
+    if args.processes == 1:
+        run_worker(args.worker_id)
+    else:
+        processes = [multiprocessing.Process(target=run_worker, name=f"worker-{i}") for i in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()